@@ -1,10 +1,17 @@
 from google.oauth2 import service_account
 import os
 from google.cloud import bigquery
-import json
-import io
+import orjson
 import logging
-from typing import Optional
+import tempfile
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import copy
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Sequence
 
 # Configure logging
 logging.basicConfig(
@@ -13,6 +20,43 @@ logging.basicConfig(
 )
 
 
+@lru_cache(maxsize=4)
+def _load_credentials(credentials_json: Optional[str], credentials_path: str,
+                      scopes: tuple) -> service_account.Credentials:
+    """
+    Build service account credentials, cached per (env JSON, file path, scopes).
+    
+    Args:
+        credentials_json: Contents of the GOOGLE_CREDENTIALS env var (preferred if set)
+        credentials_path: Path to local credentials file (used if env var not set)
+        scopes: OAuth scopes to request
+        
+    Returns:
+        service_account.Credentials: The loaded credentials
+    """
+    logger = logging.getLogger('bigquery')
+    
+    if credentials_json:
+        # Production: Use credentials from environment variable
+        logger.info("Using credentials from environment variable")
+        credentials_info = orjson.loads(credentials_json)
+        return service_account.Credentials.from_service_account_info(
+            credentials_info, 
+            scopes=list(scopes)
+        )
+    
+    # Local: Try to use credentials file
+    if not os.path.exists(credentials_path):
+        raise ValueError(
+            f"No credentials found in environment variable or local file: {credentials_path}"
+        )
+    logger.info(f"Using credentials from file: {credentials_path}")
+    return service_account.Credentials.from_service_account_file(
+        credentials_path, 
+        scopes=list(scopes)
+    )
+
+
 class BigQueryClient:
     """
     A wrapper class for Google BigQuery client with credential management.
@@ -21,14 +65,16 @@ class BigQueryClient:
     or local credentials file (development).
     """
     
-    SCOPES = [
+    # Tuple so it can be used directly as part of the credentials cache key
+    SCOPES = (
         'https://www.googleapis.com/auth/bigquery',
         'https://www.googleapis.com/auth/drive.readonly'
-    ]
+    )
     
     def __init__(self, credentials_path: str = "credentials.json"):
         """
-        Initialize BigQuery client with credentials from either file or environment variable.
+        Initialize BigQuery client settings. Credentials and the underlying client
+        are loaded lazily on first use.
         
         Args:
             credentials_path: Path to local credentials file (used if env var not found)
@@ -37,46 +83,39 @@ class BigQueryClient:
         self.credentials_path = credentials_path
         self._client: Optional[bigquery.Client] = None
         self._credentials = None
-        
-        # Initialize the client on instantiation
-        self._initialize_client()
+        self._lock = threading.Lock()
+        self._table_refs: Dict[tuple, bigquery.TableReference] = {}
+    
+    def _get_credentials(self) -> service_account.Credentials:
+        """Load (or reuse cached) credentials from either the environment or file."""
+        if self._credentials is None:
+            try:
+                # Environment variable (production) takes precedence over the local file
+                self._credentials = _load_credentials(
+                    os.getenv('GOOGLE_CREDENTIALS'),
+                    self.credentials_path,
+                    self.SCOPES
+                )
+            except orjson.JSONDecodeError as e:
+                self.logger.error(f"Failed to parse credentials JSON: {str(e)}")
+                raise
+            except Exception as e:
+                self.logger.error(f"Failed to load credentials: {str(e)}")
+                raise
+        return self._credentials
     
     def _initialize_client(self) -> None:
         """Initialize the BigQuery client with appropriate credentials."""
         try:
-            # First try to get credentials from environment variable (production)
-            credentials_json = os.getenv('GOOGLE_CREDENTIALS')
-            
-            if credentials_json:
-                # Production: Use credentials from environment variable
-                self.logger.info("Using credentials from environment variable")
-                credentials_info = json.loads(credentials_json)
-                self._credentials = service_account.Credentials.from_service_account_info(
-                    credentials_info, 
-                    scopes=self.SCOPES
-                )
-            else:
-                # Local: Try to use credentials file
-                if not os.path.exists(self.credentials_path):
-                    raise ValueError(
-                        f"No credentials found in environment variable or local file: {self.credentials_path}"
-                    )
-                self.logger.info(f"Using credentials from file: {self.credentials_path}")
-                self._credentials = service_account.Credentials.from_service_account_file(
-                    self.credentials_path, 
-                    scopes=self.SCOPES
-                )
+            credentials = self._get_credentials()
             
             # Create the BigQuery client
             self._client = bigquery.Client(
-                project=self._credentials.project_id,
-                credentials=self._credentials
+                project=credentials.project_id,
+                credentials=credentials
             )
-            self.logger.info(f"BigQuery client initialized for project: {self._credentials.project_id}")
+            self.logger.info(f"BigQuery client initialized for project: {credentials.project_id}")
             
-        except json.JSONDecodeError as e:
-            self.logger.error(f"Failed to parse credentials JSON: {str(e)}")
-            raise
         except Exception as e:
             self.logger.error(f"Failed to initialize BigQuery client: {str(e)}")
             raise
@@ -84,21 +123,24 @@ class BigQueryClient:
     @property
     def client(self) -> bigquery.Client:
         """
-        Get the BigQuery client instance.
+        Get the BigQuery client instance, creating it on first access.
         
         Returns:
             bigquery.Client: The initialized BigQuery client
         """
         if self._client is None:
-            self._initialize_client()
+            with self._lock:
+                # Re-check under the lock so concurrent first accesses build one client
+                if self._client is None:
+                    self._initialize_client()
         return self._client
     
     @property
     def project_id(self) -> str:
-        """Get the current project ID."""
-        return self._credentials.project_id if self._credentials else None
+        """Get the current project ID (loads credentials, but not the client)."""
+        return self._get_credentials().project_id
     
-    def get_dataset(self, dataset_id: str) -> bigquery.Dataset:
+    def get_dataset(self, dataset_id: str) -> bigquery.DatasetReference:
         """
         Get a dataset reference.
         
@@ -106,23 +148,27 @@ class BigQueryClient:
             dataset_id: The dataset ID
             
         Returns:
-            bigquery.Dataset: Dataset reference
+            bigquery.DatasetReference: Dataset reference
         """
-        return self.client.dataset(dataset_id)
+        return bigquery.DatasetReference(self.project_id, dataset_id)
     
-    def get_table(self, dataset_id: str, table_id: str) -> bigquery.Table:
+    def get_table(self, dataset_id: str, table_id: str) -> bigquery.TableReference:
         """
-        Get a table reference.
+        Get a table reference, cached per (dataset_id, table_id).
         
         Args:
             dataset_id: The dataset ID
             table_id: The table ID
             
         Returns:
-            bigquery.Table: Table reference
+            bigquery.TableReference: Table reference
         """
-        dataset = self.get_dataset(dataset_id)
-        return dataset.table(table_id)
+        key = (dataset_id, table_id)
+        ref = self._table_refs.get(key)
+        if ref is None:
+            ref = bigquery.TableReference(self.get_dataset(dataset_id), table_id)
+            self._table_refs[key] = ref
+        return ref
     
     def query(self, query: str, **kwargs) -> bigquery.QueryJob:
         """
@@ -139,17 +185,196 @@ class BigQueryClient:
     
     def load_table_from_dataframe(self, dataframe, destination, **kwargs) -> bigquery.LoadJob:
         """
-        Load a pandas DataFrame to a BigQuery table.
+        Load a pandas DataFrame or pyarrow Table to a BigQuery table.
+        
+        The data is spilled to a Parquet temp file and submitted with
+        load_table_from_file, so the serialized copy lives on disk rather than
+        in an in-memory buffer alongside the frame.
         
         Args:
-            dataframe: pandas DataFrame to load
+            dataframe: pandas DataFrame or pyarrow Table to load
             destination: Table reference or table ID string
             **kwargs: Additional arguments for load job configuration
             
         Returns:
             bigquery.LoadJob: Load job instance
         """
-        return self.client.load_table_from_dataframe(dataframe, destination, **kwargs)
+        if isinstance(dataframe, pa.Table):
+            table = dataframe
+        else:
+            table = pa.Table.from_pandas(dataframe, preserve_index=False)
+        return self.load_table_from_arrow(table, destination, **kwargs)
+    
+    def load_table_from_arrow(self, table: pa.Table, destination,
+                              job_config: Optional[bigquery.LoadJobConfig] = None,
+                              **kwargs) -> bigquery.LoadJob:
+        """
+        Load a pyarrow Table to a BigQuery table via a Parquet temp file.
+        
+        Args:
+            table: pyarrow Table to load
+            destination: Table reference or table ID string
+            job_config: Optional load job configuration (source format is forced to Parquet)
+            **kwargs: Additional arguments for load_table_from_file
+            
+        Returns:
+            bigquery.LoadJob: Load job instance
+        """
+        job_config = job_config or bigquery.LoadJobConfig()
+        job_config.source_format = bigquery.SourceFormat.PARQUET
+        
+        with tempfile.NamedTemporaryFile(suffix=".parquet", delete=False) as f:
+            path = f.name
+        try:
+            pq.write_table(table, path, compression="snappy")
+            # The upload is complete once load_table_from_file returns, so the file can be removed
+            with open(path, "rb") as source:
+                return self.client.load_table_from_file(source, destination, job_config=job_config, **kwargs)
+        finally:
+            os.unlink(path)
+    
+    def load_arrow_tables_parallel(self, tables: Sequence[pa.Table], destination,
+                                   job_config: bigquery.LoadJobConfig,
+                                   max_workers: int = 8) -> List[bigquery.LoadJob]:
+        """
+        Load several pyarrow Tables to one table with concurrent load jobs.
+        
+        Each table is serialized and uploaded on its own worker thread, so Parquet
+        encoding, uploads and server-side loads overlap. The destination must
+        already exist and job_config should append (WRITE_APPEND), since the jobs
+        run in no particular order.
+        
+        Args:
+            tables: pyarrow Tables sharing the destination schema
+            destination: Table reference or table ID string
+            job_config: Load job configuration shared by every job
+            max_workers: Maximum number of uploads in flight
+            
+        Returns:
+            List[bigquery.LoadJob]: The finished load jobs, in the order of tables
+        """
+        def load(table: pa.Table) -> bigquery.LoadJob:
+            # Each job gets its own config since load_table_from_arrow sets the source format on it
+            job = self.load_table_from_arrow(table, destination, job_config=copy.deepcopy(job_config))
+            job.result()
+            return job
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            jobs = list(executor.map(load, tables))
+        
+        self.logger.info(f"Loaded {len(jobs)} tables in parallel to {destination}")
+        return jobs
+    
+    def load_dataframes_batched(self, dataframes: Iterable[pd.DataFrame], destination,
+                                batch_rows: int = 1_000_000,
+                                write_disposition: str = bigquery.WriteDisposition.WRITE_APPEND,
+                                **kwargs) -> List[bigquery.LoadJob]:
+        """
+        Load many DataFrames to one table with as few load jobs as possible.
+        
+        Frames are accumulated until at least batch_rows rows are buffered, then
+        concatenated once and submitted as a single load job; the remainder is
+        flushed when the iterable is exhausted. Each load job counts against the
+        per-table daily load quota, so this caps jobs at ceil(total_rows / batch_rows).
+        
+        Args:
+            dataframes: Iterable of pandas DataFrames sharing the same columns
+            destination: Table reference or table ID string
+            batch_rows: Minimum number of rows per load job
+            write_disposition: Write disposition for the first batch; later batches always append
+                so WRITE_TRUNCATE replaces the table once instead of keeping only the last batch
+            **kwargs: Additional arguments for load_table_from_file
+            
+        Returns:
+            List[bigquery.LoadJob]: The submitted load jobs, in order
+        """
+        jobs = []
+        pending = []
+        pending_rows = 0
+        
+        def flush():
+            nonlocal pending, pending_rows
+            batch = pd.concat(pending, ignore_index=True, copy=False)
+            disposition = bigquery.WriteDisposition.WRITE_APPEND if jobs else write_disposition
+            job_config = bigquery.LoadJobConfig(write_disposition=disposition)
+            jobs.append(self.load_table_from_dataframe(batch, destination, job_config=job_config, **kwargs))
+            self.logger.info(f"Submitted load job {len(jobs)} with {len(batch)} rows to {destination}")
+            pending = []
+            pending_rows = 0
+        
+        for dataframe in dataframes:
+            if dataframe.empty:
+                continue
+            pending.append(dataframe)
+            pending_rows += len(dataframe)
+            if pending_rows >= batch_rows:
+                flush()
+        
+        if pending:
+            flush()
+        
+        return jobs
+    
+    def load_from_gcs_ndjson(self, gcs_uri: str, destination,
+                             schema: Optional[Sequence[bigquery.SchemaField]] = None,
+                             write_disposition: str = bigquery.WriteDisposition.WRITE_APPEND) -> bigquery.LoadJob:
+        """
+        Load newline-delimited JSON files from Cloud Storage to a BigQuery table.
+        
+        Args:
+            gcs_uri: gs:// URI (wildcards allowed) of the NDJSON files
+            destination: Table reference or table ID string
+            schema: Optional table schema (autodetected if not given)
+            write_disposition: Write disposition for the load job
+            
+        Returns:
+            bigquery.LoadJob: Load job instance
+        """
+        job_config = bigquery.LoadJobConfig(
+            source_format=bigquery.SourceFormat.NEWLINE_DELIMITED_JSON,
+            schema=schema,
+            autodetect=schema is None,
+            write_disposition=write_disposition
+        )
+        return self.client.load_table_from_uri(gcs_uri, destination, job_config=job_config)
+    
+    def load_ndjson_records(self, records: Iterable[Dict[str, Any]], destination,
+                            schema: Optional[Sequence[bigquery.SchemaField]] = None,
+                            write_disposition: str = bigquery.WriteDisposition.WRITE_APPEND) -> bigquery.LoadJob:
+        """
+        Stream records to a BigQuery table as newline-delimited JSON in one load job.
+        
+        Records are serialized one at a time into a temp file, so a generator of
+        records never needs to be materialized as a list or a single JSON string.
+        
+        Args:
+            records: Iterable of JSON-serializable dicts, one per row
+            destination: Table reference or table ID string
+            schema: Optional table schema (autodetected if not given)
+            write_disposition: Write disposition for the load job
+            
+        Returns:
+            bigquery.LoadJob: Load job instance
+        """
+        job_config = bigquery.LoadJobConfig(
+            source_format=bigquery.SourceFormat.NEWLINE_DELIMITED_JSON,
+            schema=schema,
+            autodetect=schema is None,
+            write_disposition=write_disposition
+        )
+        
+        f = tempfile.NamedTemporaryFile(suffix=".ndjson", delete=False)
+        path = f.name
+        # One try around writing and loading so the file is removed even if records raises
+        try:
+            with f:
+                for record in records:
+                    f.write(orjson.dumps(record))
+                    f.write(b"\n")
+            with open(path, "rb") as source:
+                return self.client.load_table_from_file(source, destination, job_config=job_config)
+        finally:
+            os.unlink(path)
 
 
 # Create a default instance for backward compatibility
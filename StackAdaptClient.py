@@ -1,192 +1,860 @@
+import asyncio
+import httpx
+import numpy as np
+import orjson
+import pyarrow as pa
+import pyarrow.parquet as pq
 import requests
-import json
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import argparse
 import os
+import sys
+import gzip
+import hashlib
+import logging
+import random
+import tempfile
 import time
+from datetime import date, datetime, timedelta, timezone
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache, wraps
+from itertools import batched
 from dotenv import load_dotenv
-from typing import Optional, Dict, List, Any
+from typing import Optional, Dict, List, Any, Tuple, Iterable, Iterator, Union
 
 # Load environment variables from .env file
 load_dotenv()
 
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=64)
+def _encode_query(query: str) -> bytes:
+    """JSON-encode a query string once; the same few query documents are sent repeatedly"""
+    return orjson.dumps(query)
+
+
+def _encode_payload(query: str, variables: Dict[str, Any]) -> bytes:
+    """Build the GraphQL request body, reusing the cached encoding of the query string"""
+    return b'{"query":' + _encode_query(query) + b',"variables":' + orjson.dumps(variables) + b'}'
+
+
+@lru_cache(maxsize=64)
+def _aliased_batch_document(count: int, fragment: str) -> str:
+    """
+    GraphQL document with `count` aliased insights fields (a0, a1, ...) taking $ids0, $ids1, ...
+    
+    The document only depends on the batch size and fragment, so it is built once per size.
+    """
+    variable_defs = " ".join(f"$ids{i}: [ID!]!" for i in range(count))
+    fields = "\n".join(
+        f"a{i}: campaignGroupInsight(attributes: [AD, DATE], "
+        f"date: {{from: $dateFrom, to: $dateTo}}, "
+        f"filterBy: {{advertiserIds: $ids{i}}}) {{ ...InsightFragment }}"
+        for i in range(count)
+    )
+    return (
+        f"query GetAdInsightsByDayBatch($dateFrom: ISO8601Date!, $dateTo: ISO8601Date!, {variable_defs}) {{\n"
+        f"{fields}\n"
+        f"}}\n"
+        f"{fragment}"
+    )
+
+
+def _ttl_cache(ttl: float):
+    """
+    Memoize a method's non-empty results on its instance for `ttl` seconds
+    
+    The cache lives on the instance, so it is freed with the client instead of keeping
+    every client (and its session) alive. Calls for different arguments or instances run
+    concurrently; concurrent calls for the same arguments wait for one fetch.
+    
+    Args:
+        ttl: Seconds a cached result stays valid
+    """
+    def decorator(fn):
+        attr = f"_{fn.__name__}_ttl_cache"
+        
+        def state(self) -> Tuple[Dict[Any, Tuple[float, Any]], Dict[Any, threading.Lock], threading.Lock]:
+            # dict.setdefault is atomic, so racing first calls still share one state
+            return self.__dict__.setdefault(attr, ({}, {}, threading.Lock()))
+        
+        def cache_peek(self, *args, **kwargs):
+            """Fresh cached result for these arguments, or None (never calls fn)"""
+            entries, _, lock = state(self)
+            with lock:
+                hit = entries.get((args, frozenset(kwargs.items())))
+            return hit[1] if hit is not None and time.monotonic() - hit[0] < ttl else None
+        
+        def cache_put(self, result, *args, **kwargs):
+            """Store a result produced outside the wrapper, e.g. by a streaming variant"""
+            # Don't pin failures (empty results) for the whole TTL
+            if not result:
+                return
+            entries, _, lock = state(self)
+            now = time.monotonic()
+            with lock:
+                for key in [key for key, (stored_at, _) in entries.items() if now - stored_at >= ttl]:
+                    del entries[key]
+                entries[(args, frozenset(kwargs.items()))] = (now, result)
+        
+        def cache_clear(self):
+            """Drop every cached result for this instance"""
+            entries, _, lock = state(self)
+            with lock:
+                entries.clear()
+        
+        @wraps(fn)
+        def wrapper(self, *args, **kwargs):
+            hit = cache_peek(self, *args, **kwargs)
+            if hit is not None:
+                return hit
+            
+            _, key_locks, lock = state(self)
+            with lock:
+                key_lock = key_locks.setdefault((args, frozenset(kwargs.items())), threading.Lock())
+            with key_lock:
+                # Another caller may have filled the entry while this one waited
+                hit = cache_peek(self, *args, **kwargs)
+                if hit is not None:
+                    return hit
+                result = fn(self, *args, **kwargs)
+                cache_put(self, result, *args, **kwargs)
+                return result
+        
+        wrapper.cache_clear = cache_clear
+        wrapper.cache_peek = cache_peek
+        wrapper.cache_put = cache_put
+        return wrapper
+    return decorator
+
+
+# Retry policy shared by the requests adapter and the async client
+_RETRY_TOTAL = 5
+_RETRY_BACKOFF_FACTOR = 0.3
+_RETRY_STATUSES = (429, 500, 502, 503, 504)
+# Request bodies smaller than this are sent uncompressed even with compress_requests
+_COMPRESS_MIN_BYTES = 1024
+# GraphQL error codes that come back with HTTP 200 but are worth retrying
+_TRANSIENT_ERROR_CODES = frozenset({
+    "THROTTLED", "RATE_LIMITED", "TOO_MANY_REQUESTS",
+    "INTERNAL_SERVER_ERROR", "SERVICE_UNAVAILABLE", "TIMEOUT"
+})
+
+
+def _is_transient_error(result: Dict[str, Any]) -> bool:
+    """Whether a GraphQL response failed only with throttling or server-side error codes"""
+    errors = result.get('errors')
+    # Resolvers usually report a failure as a null field ({"data": {"field": null}}),
+    # so only data with at least one non-null field counts as a (partial) success
+    data = result.get('data')
+    if not errors or (data and any(value is not None for value in data.values())):
+        return False
+    return all(
+        isinstance(error, dict) and (error.get('extensions') or {}).get('code') in _TRANSIENT_ERROR_CODES
+        for error in errors
+    )
+
+
+def _retry_delay(response: Optional[httpx.Response], attempt: int) -> float:
+    """
+    Seconds to wait before retry number attempt (0-based)
+    
+    Honors a numeric Retry-After header when the server sends one, otherwise uses
+    exponential backoff with jitter (the same factor as the requests adapter).
+    """
+    if response is not None:
+        retry_after = response.headers.get("Retry-After")
+        if retry_after is not None:
+            try:
+                return max(0.0, float(retry_after))
+            except ValueError:
+                pass  # HTTP-date form; fall back to backoff
+    return _RETRY_BACKOFF_FACTOR * (2 ** attempt) + random.uniform(0, _RETRY_BACKOFF_FACTOR)
+
+
+def _check_concurrency(value: int, name: str):
+    """Raise ValueError unless value allows at least one request in flight"""
+    if value < 1:
+        raise ValueError(f"{name} must be at least 1, got {value}")
+
+
+def _date_windows(date_from: str, date_to: str, days: int) -> List[Tuple[str, str]]:
+    """Split an inclusive YYYY-MM-DD range into consecutive windows of at most `days` days"""
+    if days < 1:
+        raise ValueError(f"Date window must be at least 1 day, got {days}")
+    start, end = date.fromisoformat(date_from), date.fromisoformat(date_to)
+    windows = []
+    while start <= end:
+        window_end = min(start + timedelta(days=days - 1), end)
+        windows.append((start.isoformat(), window_end.isoformat()))
+        start = window_end + timedelta(days=1)
+    return windows
+
+
+# Integer metric columns (typed INT64 in the Arrow and BigQuery schemas)
+INTEGER_METRIC_COLUMNS = [
+    'clicks', 'clickConversions', 'engagements', 'videoStarts',
+    'videoQ1Playbacks', 'videoQ2Playbacks', 'videoQ3Playbacks',
+    'videoCompletions', 'impressions'
+]
+
+# Arrow schema of the ads performance tables (mirrors the BigQuery ADS_PERFORMANCE_SCHEMA in the
+# pipeline), shared by the pipeline upload and the CLI's Parquet output
+ADS_PERFORMANCE_ARROW_SCHEMA = pa.schema([
+    ('ad_id', pa.string()),
+    ('ad_name', pa.string()),
+    ('date', pa.date32()),
+    ('campaign_id', pa.string()),
+    ('campaign_name', pa.string()),
+    ('campaign_group_id', pa.string()),
+    ('campaign_group_name', pa.string()),
+    ('goalType', pa.string()),
+    *[(col, pa.int64()) for col in INTEGER_METRIC_COLUMNS],
+    ('frequency', pa.float64()),
+    ('cost', pa.float64()),
+    ('_loaded_at', pa.timestamp('us', tz='UTC')),
+    ('_source', pa.string()),
+])
+
+
+def columns_to_arrow(columns: Dict[str, list], loaded_at: datetime, source: str) -> pa.Table:
+    """
+    Build the upload table from flattened column arrays using ADS_PERFORMANCE_ARROW_SCHEMA
+    
+    Args:
+        columns: Column arrays as returned by StackAdaptClient.flatten_to_columns
+        loaded_at: Load timestamp written to every row
+        source: Source label written to every row
+        
+    Returns:
+        pa.Table with one typed column per schema field
+    """
+    num_rows = len(columns['ad_id'])
+    
+    # Constant columns are filled from one scalar instead of a per-row Python list
+    metadata = {
+        '_loaded_at': pa.repeat(pa.scalar(loaded_at, ADS_PERFORMANCE_ARROW_SCHEMA.field('_loaded_at').type), num_rows),
+        '_source': pa.repeat(pa.scalar(source, pa.string()), num_rows),
+    }
+    
+    arrays = []
+    for field in ADS_PERFORMANCE_ARROW_SCHEMA:
+        if field.name in metadata:
+            arrays.append(metadata[field.name])
+            continue
+        values = columns[field.name]
+        if field.name == 'date':
+            # API dates are ISO YYYY-MM-DD strings, which numpy parses natively in C;
+            # from_pandas maps missing dates (NaT) to nulls
+            arrays.append(pa.array(np.asarray(values, dtype='datetime64[D]'), type=field.type, from_pandas=True))
+        else:
+            # Infer first and cast safely: pa.array(type=int64) would silently truncate a
+            # fractional count, while the cast raises ArrowInvalid instead
+            arrays.append(pa.array(values).cast(field.type))
+    
+    return pa.Table.from_arrays(arrays, schema=ADS_PERFORMANCE_ARROW_SCHEMA)
+
+
+class _TokenBucket:
+    """
+    Thread-safe token bucket used to cap the request rate across worker threads
+    """
+    
+    def __init__(self, rate: float, capacity: float = 1.0):
+        """
+        Args:
+            rate: Tokens added per second (i.e. allowed requests per second)
+            capacity: Maximum number of tokens that can accumulate (burst size)
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self):
+        """Block until a token is available, then consume it"""
+        while True:
+            wait = self._reserve()
+            if wait == 0.0:
+                return
+            time.sleep(wait)
+    
+    def _reserve(self) -> float:
+        """Consume a token if one is available, otherwise return the seconds to wait"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+    
+    async def acquire_async(self):
+        """Wait without blocking the event loop until a token is available, then consume it"""
+        while True:
+            wait = self._reserve()
+            if wait == 0.0:
+                return
+            await asyncio.sleep(wait)
+
+
+class _ResponseCache:
+    """
+    Disk-backed TTL cache for GraphQL responses (one JSON file per entry)
+    
+    Expired entries are deleted when read and pruned when the cache is opened, so the
+    directory does not grow with every new date range.
+    """
+    
+    def __init__(self, cache_dir: str):
+        """
+        Args:
+            cache_dir: Directory holding the cache files (created if missing)
+        """
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+        self.prune()
+    
+    def prune(self):
+        """Delete expired entries and temp files left behind by interrupted writes"""
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            if name.endswith(".tmp"):
+                self._unlink(path)
+            elif name.endswith(".json"):
+                self._read(path)
+    
+    @staticmethod
+    def _unlink(path: str):
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+    
+    @staticmethod
+    def make_key(*parts: str) -> str:
+        """Build a stable cache key from the given string parts"""
+        digest = hashlib.blake2b(digest_size=32)
+        for part in parts:
+            digest.update(part.encode())
+            digest.update(b"\0")
+        return digest.hexdigest()
+    
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+    
+    def _read(self, path: str) -> Optional[Dict[str, Any]]:
+        """Value stored at path, deleting the file if it is expired or unreadable"""
+        try:
+            with open(path, "rb") as f:
+                entry = orjson.loads(f.read())
+        except OSError:
+            return None
+        except orjson.JSONDecodeError:
+            self._unlink(path)
+            return None
+        
+        if entry.get("expires_at") is not None and entry["expires_at"] < time.time():
+            self._unlink(path)
+            return None
+        return entry.get("value")
+    
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached value for key, or None if missing or expired"""
+        return self._read(self._path(key))
+    
+    def set(self, key: str, value: Dict[str, Any], ttl: Optional[float] = None):
+        """
+        Store value under key
+        
+        Args:
+            key: Cache key
+            value: JSON-serializable value to store
+            ttl: Seconds until the entry expires (None never expires)
+        """
+        entry = {
+            "expires_at": time.time() + ttl if ttl is not None else None,
+            "value": value
+        }
+        # Write to a temp file and rename so concurrent readers never see a partial entry
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(orjson.dumps(entry))
+            os.replace(tmp_path, self._path(key))
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
 
 class StackAdaptClient:
     """
     Client for interacting with the StackAdapt GraphQL API
     """
     
-    def __init__(self, api_key: Optional[str] = None, endpoint: Optional[str] = None):
+    # Selection set shared by the insights query and every alias in an aliased batch document
+    _INSIGHT_FRAGMENT = """
+        fragment InsightFragment on CampaignGroupInsightOutcome {
+          records {
+            edges {
+              node {
+                attributes {
+                  ad {
+                    id
+                    name
+                    campaign {
+                      id
+                      name
+                      campaignGoal {
+                        goalsConnection(first:1) {
+                          edges {
+                            node {
+                              goalType
+                            }
+                          }
+                        }
+                      }
+                      goalType
+                      campaignGroup {
+                        id
+                        name
+                        advertiser {
+                          id
+                          name
+                        }
+                      }
+                    }
+                  }
+                  date
+                }
+                metrics {
+                  clicks
+                  clickConversions
+                  engagements
+                  videoStarts
+                  videoQ1Playbacks
+                  videoQ2Playbacks
+                  videoQ3Playbacks
+                  videoCompletions
+                  impressions
+                  frequency
+                  cost
+                }
+              }
+            }
+          }
+        }
+    """
+    
+    # Narrower selection with only the fields the flatten helpers read (no campaign goals
+    # or advertiser details), which roughly halves the nested payload per edge
+    _FLAT_INSIGHT_FRAGMENT = """
+        fragment InsightFragment on CampaignGroupInsightOutcome {
+          records {
+            edges {
+              node {
+                attributes {
+                  ad {
+                    id
+                    name
+                    campaign {
+                      id
+                      name
+                      goalType
+                      campaignGroup {
+                        id
+                        name
+                      }
+                    }
+                  }
+                  date
+                }
+                metrics {
+                  clicks
+                  clickConversions
+                  engagements
+                  videoStarts
+                  videoQ1Playbacks
+                  videoQ2Playbacks
+                  videoQ3Playbacks
+                  videoCompletions
+                  impressions
+                  frequency
+                  cost
+                }
+              }
+            }
+          }
+        }
+    """
+    
+    # Metric fields requested for every ad/day, in output column order (cost is in cents)
+    METRIC_COLUMNS = (
+        'clicks', 'clickConversions', 'engagements', 'videoStarts',
+        'videoQ1Playbacks', 'videoQ2Playbacks', 'videoQ3Playbacks',
+        'videoCompletions', 'impressions', 'frequency', 'cost'
+    )
+    
+    # Columns produced by the flatten helpers
+    RECORD_COLUMNS = (
+        'ad_id', 'ad_name', 'date', 'campaign_id', 'campaign_name',
+        'campaign_group_id', 'campaign_group_name', 'goalType'
+    ) + METRIC_COLUMNS
+    
+    # Advertiser ID page, following pagination cursors
+    _ADVERTISERS_QUERY = """
+        query GetAllAdvertiserIds($after: String) {
+          advertisers(first: 100, after: $after) {
+            pageInfo {
+              hasNextPage
+              endCursor
+            }
+            edges {
+              node {
+                id
+              }
+            }
+          }
+        }
+    """
+    
+    # Cheapest valid document; also used to open connections ahead of the real requests
+    _TEST_CONNECTION_QUERY = """
+        query TestConnection {
+          __typename
+        }
+    """
+    
+    # Insights operation shared by the single and bulk fetches (fragment appended below)
+    _INSIGHTS_OPERATION = """
+        query GetAdInsightsByDay($ids: [ID!]!, $dateFrom: ISO8601Date!, $dateTo: ISO8601Date!) {
+          campaignGroupInsight(
+            attributes: [AD, DATE]
+            date: {
+              from: $dateFrom
+              to: $dateTo
+            }
+            filterBy: {
+              advertiserIds: $ids
+            }
+          ) {
+            ...InsightFragment
+          }
+        }
+    """
+    _INSIGHTS_QUERY = _INSIGHTS_OPERATION + _INSIGHT_FRAGMENT
+    _FLAT_INSIGHTS_QUERY = _INSIGHTS_OPERATION + _FLAT_INSIGHT_FRAGMENT
+    
+    def __init__(self, api_key: Optional[str] = None, endpoint: Optional[str] = None,
+                 cache_dir: Optional[str] = ".sa_cache", cache_ttl: Optional[float] = None,
+                 recent_cache_ttl: float = 300, memoize: bool = True,
+                 full_selection: bool = True, compress_requests: bool = False):
         """
         Initialize the StackAdapt client
         
         Args:
             api_key: StackAdapt API key (defaults to env var STACKADAPT_API_KEY)
             endpoint: GraphQL endpoint URL (defaults to production endpoint)
+            cache_dir: Directory for the on-disk response cache (None disables caching)
+            cache_ttl: Seconds to keep responses for historical date ranges (None keeps forever)
+            recent_cache_ttl: Seconds to keep responses whose range reaches today or that
+                have no date range (e.g. the advertiser list)
+            memoize: Whether to also keep responses in memory so identical queries within
+                this process skip both the network and the disk cache (same TTLs)
+            full_selection: Whether insights queries also request campaign goals and advertiser
+                details; False requests only the fields the flatten helpers read
+            compress_requests: Whether to gzip request bodies over 1 KB (Content-Encoding: gzip);
+                off by default because not every GraphQL server accepts compressed bodies
         """
+        self.logger = logging.getLogger('stackadapt')
         self.api_key = api_key or os.getenv('STACKADAPT_API_KEY')
         if not self.api_key:
             raise ValueError("STACKADAPT_API_KEY not found. Please provide it or set it in environment variables")
         
         self.endpoint = endpoint or "https://api.stackadapt.com/graphql"
         self.session = requests.Session()
+        self._setup_session()
         self._setup_headers()
+        
+        self.cache_ttl = cache_ttl
+        self.recent_cache_ttl = recent_cache_ttl
+        self._cache = _ResponseCache(cache_dir) if cache_dir else None
+        self.memoize = memoize
+        self.compress_requests = compress_requests
+        self._insight_fragment = self._INSIGHT_FRAGMENT if full_selection else self._FLAT_INSIGHT_FRAGMENT
+        self._insights_query = self._INSIGHTS_QUERY if full_selection else self._FLAT_INSIGHTS_QUERY
+        self._memo: Dict[str, Tuple[Optional[float], Dict[str, Any]]] = {}
+    
+    def _setup_session(self, pool_size: int = 32):
+        """
+        Mount a pooled, retrying adapter so connections are kept alive and reused
+        
+        Args:
+            pool_size: Connections kept per host; should be at least the number of worker threads
+        """
+        # urllib3 also honors Retry-After on 429/503 responses
+        retry = Retry(
+            total=_RETRY_TOTAL,
+            backoff_factor=_RETRY_BACKOFF_FACTOR,
+            status_forcelist=list(_RETRY_STATUSES),
+            allowed_methods=["POST"]
+        )
+        adapter = HTTPAdapter(pool_connections=32, pool_maxsize=pool_size, max_retries=retry)
+        # Close the adapters being replaced so their pooled sockets are released now, not at GC
+        for prefix in ("https://", "http://"):
+            previous = self.session.adapters.get(prefix)
+            if previous is not None:
+                previous.close()
+        # Mount for both schemes so a plain-http endpoint (e.g. a local mock) reuses the pool too
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._pool_size = pool_size
     
     def _setup_headers(self):
         """Setup default headers for all requests"""
         self.session.headers.update({
             "Content-Type": "application/json",
             "Accept": "application/json",
+            # Explicit so compressed responses survive any header overrides (both clients decode it)
+            "Accept-Encoding": "gzip, deflate",
+            "Connection": "keep-alive",
             "Authorization": f"Bearer {self.api_key}"
         })
     
-    def execute_query(self, query: str, variables: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+    def _cache_key(self, query: str, variables: Dict[str, Any]) -> str:
+        """Cache key for a query, scoped to the endpoint and API key"""
+        return _ResponseCache.make_key(self.endpoint, self.api_key, query, orjson.dumps(variables, option=orjson.OPT_SORT_KEYS).decode())
+    
+    def _ttl_for(self, variables: Dict[str, Any]) -> Optional[float]:
+        """
+        Pick the cache TTL for a query's variables
+        
+        Insights for a date range that ended before today (UTC, the same clock the pipeline
+        uses for its date range) cannot change, so they use cache_ttl; anything else may
+        still change and uses recent_cache_ttl.
+        """
+        date_to = variables.get('dateTo')
+        if date_to and date_to < datetime.now(timezone.utc).date().isoformat():
+            return self.cache_ttl
+        return self.recent_cache_ttl
+    
+    @property
+    def _caching(self) -> bool:
+        """Whether any response cache (memory or disk) is enabled"""
+        return self.memoize or self._cache is not None
+    
+    def _cached_response(self, key: str, variables: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Look a response up in memory, then on disk; None on a miss"""
+        entry = self._memo.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at is None or expires_at > time.time():
+                return value
+            self._memo.pop(key, None)
+        
+        if self._cache is not None:
+            value = self._cache.get(key)
+            if value is not None:
+                self._memoize(key, variables, value)
+                return value
+        return None
+    
+    def _memoize(self, key: str, variables: Dict[str, Any], value: Dict[str, Any]):
+        """Keep a response in memory for its TTL"""
+        if self.memoize:
+            ttl = self._ttl_for(variables)
+            self._memo[key] = (time.time() + ttl if ttl is not None else None, value)
+    
+    def _cache_result(self, key: str, variables: Dict[str, Any], result: Optional[Dict[str, Any]]):
+        """Store a successful response (data and no errors) in the enabled caches"""
+        if result and result.get('data') and not result.get('errors'):
+            if self._cache is not None:
+                self._cache.set(key, result, ttl=self._ttl_for(variables))
+            self._memoize(key, variables, result)
+    
+    def cache_clear(self):
+        """Drop responses memoized in this process (the disk cache is left alone)"""
+        self._memo.clear()
+        StackAdaptClient.get_all_advertiser_ids.cache_clear(self)
+    
+    def execute_query(self, query: str, variables: Optional[Dict[str, Any]] = None,
+                      use_cache: bool = True) -> Optional[Dict[str, Any]]:
         """
         Execute a GraphQL query
         
         Args:
             query: GraphQL query string
             variables: Optional variables for the query
+            use_cache: Whether to read and write the response caches
             
         Returns:
             Response data or None if failed
         """
-        payload = {
-            "query": query,
-            "variables": variables or {}
-        }
+        variables = variables or {}
+        use_cache = use_cache and self._caching
+        if use_cache:
+            key = self._cache_key(query, variables)
+            cached = self._cached_response(key, variables)
+            if cached is not None:
+                return cached
         
+        payload = _encode_payload(query, variables)
+        # The adapter retries transport failures and retryable statuses; this loop retries
+        # throttling and server errors reported in the GraphQL body of a 200 response
+        for attempt in range(_RETRY_TOTAL + 1):
+            result = self._post(payload)
+            if result is None or not _is_transient_error(result) or attempt == _RETRY_TOTAL:
+                break
+            delay = _retry_delay(None, attempt)
+            self.logger.warning(f"GraphQL request returned a transient error, retrying in {delay:.2f}s "
+                                f"(attempt {attempt + 1}/{_RETRY_TOTAL})")
+            time.sleep(delay)
+        
+        if use_cache:
+            self._cache_result(key, variables, result)
+        return result
+    
+    def _request_body(self, payload: bytes) -> Tuple[bytes, Optional[Dict[str, str]]]:
+        """Request body and extra headers, gzipped when compression is enabled and worthwhile"""
+        if self.compress_requests and len(payload) > _COMPRESS_MIN_BYTES:
+            return gzip.compress(payload, compresslevel=5), {"Content-Encoding": "gzip"}
+        return payload, None
+    
+    def _post(self, payload: bytes) -> Optional[Dict[str, Any]]:
+        """
+        POST an encoded GraphQL payload on the pooled session
+        
+        Args:
+            payload: Request body from _encode_payload
+            
+        Returns:
+            Decoded response or None if the request failed
+        """
         try:
-            response = self.session.post(
-                self.endpoint,
-                json=payload,
-                timeout=30
-            )
+            # Session headers already declare the JSON content type, so send pre-encoded bytes
+            body, headers = self._request_body(payload)
+            response = self.session.post(self.endpoint, data=body, headers=headers, timeout=30)
             response.raise_for_status()
-            return response.json()
+            return orjson.loads(response.content)
         except requests.exceptions.RequestException as e:
-            print(f"GraphQL request failed: {e}")
+            self.logger.error(f"GraphQL request failed: {e}")
             if hasattr(e, 'response') and e.response is not None:
-                print(f"Response status: {e.response.status_code}")
-                print(f"Response body: {e.response.text}")
+                self.logger.error(f"Response status: {e.response.status_code}")
+                self.logger.debug(f"Response body: {e.response.text}")
+            return None
+        except orjson.JSONDecodeError as e:
+            self.logger.error(f"Failed to decode GraphQL response: {e}")
             return None
     
+    @_ttl_cache(900)
     def get_all_advertiser_ids(self) -> List[str]:
         """
-        Fetch all advertiser IDs from the GraphQL API
+        Fetch all advertiser IDs from the GraphQL API, following pagination cursors
         
         Returns:
             List of advertiser IDs
         """
-        query = """
-            query GetAllAdvertiserIds {
-              advertisers(first: 100) {
-                edges {
-                  node {
-                    id
-                    name
-                  }
-                }
-              }
-            }
+        advertiser_ids = []
+        for page in self._advertiser_id_pages():
+            if page is None:
+                return []
+            advertiser_ids.extend(page)
+        return advertiser_ids
+    
+    def iter_advertiser_ids(self) -> Iterator[str]:
         """
+        Yield advertiser IDs page by page, so work can start before pagination finishes
         
-        result = self.execute_query(query)
+        Shares get_all_advertiser_ids' in-process cache: a fresh cached list is replayed
+        without paging, and a complete pagination refills the cache. Unlike
+        get_all_advertiser_ids, a page that fails ends the iteration early but keeps the IDs
+        already yielded.
         
-        if result and 'data' in result and 'advertisers' in result['data']:
-            advertiser_ids = []
-            for edge in result['data']['advertisers']['edges']:
-                advertiser_ids.append(edge['node']['id'])
-            return advertiser_ids
-        else:
-            print("Failed to fetch advertiser IDs")
-            return []
+        Yields:
+            Advertiser IDs in API order
+        """
+        cached = StackAdaptClient.get_all_advertiser_ids.cache_peek(self)
+        if cached is not None:
+            yield from cached
+            return
+        
+        advertiser_ids = []
+        for page in self._advertiser_id_pages():
+            if page is None:
+                return
+            advertiser_ids.extend(page)
+            yield from page
+        StackAdaptClient.get_all_advertiser_ids.cache_put(self, advertiser_ids)
     
-    def get_ad_insights_by_day_single(self, advertiser_id: str, 
-                                      date_from: str = "2020-06-01", 
-                                      date_to: str = "2020-10-30") -> Optional[Dict[str, Any]]:
+    def _advertiser_id_pages(self) -> Iterator[Optional[List[str]]]:
+        """Yield each page of advertiser IDs, then a final None if a page failed"""
+        cursor = None
+        while True:
+            result = self.execute_query(self._ADVERTISERS_QUERY, {"after": cursor})
+            try:
+                page = result['data']['advertisers']
+                ids = [edge['node']['id'] for edge in page['edges']]
+                has_next = page['pageInfo']['hasNextPage']
+                cursor = page['pageInfo']['endCursor']
+            except (KeyError, TypeError):
+                self.logger.error("Failed to fetch advertiser IDs")
+                yield None
+                return
+            yield ids
+            if not has_next:
+                return
+    
+    def get_ad_insights_by_day(self, advertiser_ids: Union[str, List[str]],
+                               date_from: str = "2020-06-01",
+                               date_to: str = "2020-10-30") -> Optional[Dict[str, Any]]:
         """
-        Fetch ad insights for a single advertiser ID
+        Fetch ad insights for one or more advertiser IDs in one query
         
         Args:
-            advertiser_id: The advertiser ID to fetch insights for
+            advertiser_ids: Advertiser ID or list of advertiser IDs to fetch insights for
             date_from: Start date (YYYY-MM-DD format)
             date_to: End date (YYYY-MM-DD format)
             
         Returns:
             Query result or None if failed
         """
-        query = """
-            query GetAdInsightsByDay($ids: [ID!]!, $dateFrom: ISO8601Date!, $dateTo: ISO8601Date!) {
-              campaignGroupInsight(
-                attributes: [AD, DATE]
-                date: {
-                  from: $dateFrom
-                  to: $dateTo
-                }
-                filterBy: {
-                  advertiserIds: $ids
-                }
-              ) {
-                ... on CampaignGroupInsightOutcome {
-                  records {
-                    edges {
-                      node {
-                        attributes {
-                          ad {
-                            id
-                            name
-                            campaign {
-                              id
-                              name
-                              campaignGoal {
-                                goalsConnection(first:1) {
-                                  edges {
-                                    node {
-                                      goalType
-                                    }
-                                  }
-                                }
-                              }
-                              goalType
-                              campaignGroup {
-                                id
-                                name
-                                advertiser {
-                                  id
-                                  name
-                                }
-                              }
-                            }
-                          }
-                          date
-                        }
-                        metrics {
-                          clicks
-                          clickConversions
-                          engagements
-                          videoStarts
-                          videoQ1Playbacks
-                          videoQ2Playbacks
-                          videoQ3Playbacks
-                          videoCompletions
-                          impressions
-                          frequency
-                          cost
-                        }
-                      }
-                    }
-                  }
-                }
-              }
-            }
-        """
+        if isinstance(advertiser_ids, str):
+            advertiser_ids = [advertiser_ids]
         
         variables = {
-            "ids": [advertiser_id],
+            "ids": advertiser_ids,
             "dateFrom": date_from,
             "dateTo": date_to
         }
         
-        return self.execute_query(query, variables)
+        return self.execute_query(self._insights_query, variables)
+    
+    def get_ad_insights_by_day_single(self, advertiser_id: str, 
+                                      date_from: str = "2020-06-01", 
+                                      date_to: str = "2020-10-30") -> Optional[Dict[str, Any]]:
+        """
+        Fetch ad insights for a single advertiser ID
+        
+        Args:
+            advertiser_id: The advertiser ID to fetch insights for
+            date_from: Start date (YYYY-MM-DD format)
+            date_to: End date (YYYY-MM-DD format)
+            
+        Returns:
+            Query result or None if failed
+        """
+        return self.get_ad_insights_by_day(advertiser_id, date_from, date_to)
     
     def get_ad_insights_by_day_bulk(self, advertiser_ids: List[str], 
                                     date_from: str = "2020-06-01", 
@@ -202,79 +870,106 @@ class StackAdaptClient:
         Returns:
             Query result or None if failed
         """
-        query = """
-          query GetAdInsightsByDay($ids: [ID!]!, $dateFrom: ISO8601Date!, $dateTo: ISO8601Date!) {
-            campaignGroupInsight(
-              attributes: [AD, DATE]
-              date: {
-                from: $dateFrom
-                to: $dateTo
-              }
-              filterBy: {
-                advertiserIds: $ids
-              }
-            ) {
-              ... on CampaignGroupInsightOutcome {
-                records {
-                  edges {
-                    node {
-                      attributes {
-                        ad {
-                          id
-                          name
-                          campaign {
-                            id
-                            name
-                            campaignGoal {
-                              goalsConnection(first:1) {
-                                edges {
-                                  node {
-                                    goalType
-                                  }
-                                }
-                              }
-                            }
-                            goalType
-                            campaignGroup {
-                              id
-                              name
-                              advertiser {
-                                id
-                                name
-                              }
-                            }
-                          }
-                        }
-                        date
-                      }
-                      metrics {
-                        clicks
-                        clickConversions
-                        engagements
-                        videoStarts
-                        videoQ1Playbacks
-                        videoQ2Playbacks
-                        videoQ3Playbacks
-                        videoCompletions
-                        impressions
-                        frequency
-                        cost
-                      }
-                    }
-                  }
-                }
-              }
-            }
-          }
+        return self.get_ad_insights_by_day(advertiser_ids, date_from, date_to)
+    
+    def get_ad_insights_by_day_chunked(self, advertiser_ids: List[str],
+                                       date_from: str = "2020-06-01",
+                                       date_to: str = "2020-10-30",
+                                       chunk_size: int = 25) -> List[Dict[str, Any]]:
         """
+        Fetch ad insights with up to chunk_size advertiser IDs passed as $ids per request
         
-        variables = {
-            "ids": advertiser_ids,
-            "dateFrom": date_from,
-            "dateTo": date_to
-        }
+        A middle ground between one request per advertiser and a single bulk request:
+        N advertisers cost ceil(N/chunk_size) round-trips, and a failing chunk only loses
+        its own advertisers.
         
-        return self.execute_query(query, variables)
+        Args:
+            advertiser_ids: List of advertiser IDs to fetch insights for
+            date_from: Start date (YYYY-MM-DD format)
+            date_to: End date (YYYY-MM-DD format)
+            chunk_size: Maximum number of advertiser IDs per request
+            
+        Returns:
+            List of successful query results, one per chunk that returned data
+        """
+        results = []
+        for chunk_ids in batched(advertiser_ids, chunk_size):
+            result = self.get_ad_insights_by_day(list(chunk_ids), date_from, date_to)
+            if result and self._check_data_retrieved(result, f"bulk chunk ({len(chunk_ids)} advertisers)"):
+                results.append(result)
+            elif not result:
+                self.logger.error(f"Failed to fetch bulk chunk starting at advertiser {chunk_ids[0]}")
+        return results
+    
+    def get_ad_insights_by_day_aliased_batch(self, advertiser_ids: List[str],
+                                             date_from: str = "2020-06-01",
+                                             date_to: str = "2020-10-30",
+                                             chunk: int = 10) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Fetch ad insights for multiple advertiser IDs, one aliased field per advertiser
+        
+        Each request carries up to `chunk` aliased `campaignGroupInsight` fields, so N
+        advertisers cost ceil(N/chunk) round-trips while results stay separated per advertiser.
+        
+        Args:
+            advertiser_ids: List of advertiser IDs to fetch insights for
+            date_from: Start date (YYYY-MM-DD format)
+            date_to: End date (YYYY-MM-DD format)
+            chunk: Maximum number of aliases per document (keep small to stay under
+                the API's query complexity limits)
+            
+        Returns:
+            Dict mapping each advertiser ID to a result shaped like a single-advertiser
+            response, or None if its part of the query failed
+        """
+        results = {}
+        for start in range(0, len(advertiser_ids), chunk):
+            chunk_ids = advertiser_ids[start:start + chunk]
+            query, variables = self._build_aliased_batch_query(chunk_ids, date_from, date_to)
+            result = self.execute_query(query, variables)
+            results.update(self._split_aliased_batch_result(result, chunk_ids))
+        
+        return results
+    
+    def _build_aliased_batch_query(self, advertiser_ids: List[str], date_from: str,
+                                   date_to: str) -> Tuple[str, Dict[str, Any]]:
+        """
+        Build a GraphQL document with one aliased insights field per advertiser
+        
+        Args:
+            advertiser_ids: Advertiser IDs to alias into the document (a0, a1, ...)
+            date_from: Start date (YYYY-MM-DD format)
+            date_to: End date (YYYY-MM-DD format)
+            
+        Returns:
+            Tuple of (query string, variables dict)
+        """
+        query = _aliased_batch_document(len(advertiser_ids), self._insight_fragment)
+        
+        variables = {"dateFrom": date_from, "dateTo": date_to}
+        for i, advertiser_id in enumerate(advertiser_ids):
+            variables[f"ids{i}"] = [advertiser_id]
+        
+        return query, variables
+    
+    def _split_aliased_batch_result(self, result: Optional[Dict[str, Any]],
+                                    advertiser_ids: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Re-key an aliased batch response back to the advertiser IDs it was built from
+        
+        Args:
+            result: GraphQL response for a document built by _build_aliased_batch_query
+            advertiser_ids: The advertiser IDs in the same order used to build the document
+            
+        Returns:
+            Dict mapping each advertiser ID to a single-advertiser shaped result or None
+        """
+        data = result.get('data') if result else None
+        results = {}
+        for i, advertiser_id in enumerate(advertiser_ids):
+            insight = data.get(f"a{i}") if data else None
+            results[advertiser_id] = {'data': {'campaignGroupInsight': insight}} if insight is not None else None
+        return results
     
     def _check_data_retrieved(self, result: Dict[str, Any], advertiser_id: str) -> bool:
         """
@@ -288,96 +983,548 @@ class StackAdaptClient:
             True if data records were found, False otherwise
         """
         try:
-            # Navigate through the GraphQL response structure
-            if (result and 
-                'data' in result and 
-                'campaignGroupInsight' in result['data'] and 
-                'records' in result['data']['campaignGroupInsight'] and
-                'edges' in result['data']['campaignGroupInsight']['records']):
-                
-                edges = result['data']['campaignGroupInsight']['records']['edges']
-                record_count = len(edges)
-                
-                if record_count > 0:
-                    print(f"  → Found {record_count} records for advertiser {advertiser_id}")
-                    return True
-                else:
-                    print(f"  → No records found for advertiser {advertiser_id}")
-                    return False
-            else:
-                print(f"  → Invalid response structure for advertiser {advertiser_id}")
-                return False
-                
-        except Exception as e:
-            print(f"  → Error checking data for advertiser {advertiser_id}: {e}")
+            edges = result['data']['campaignGroupInsight']['records']['edges']
+            record_count = len(edges)
+        except (KeyError, TypeError, AttributeError):
+            self.logger.warning(f"Invalid response structure for advertiser {advertiser_id}")
             return False
+        
+        if record_count > 0:
+            self.logger.debug(f"Found {record_count} records for advertiser {advertiser_id}")
+            return True
+        
+        self.logger.debug(f"No records found for advertiser {advertiser_id}")
+        return False
+    
+    def _handle_advertiser_result(self, advertiser_id: str, result: Optional[Dict[str, Any]]) -> bool:
+        """
+        Log the outcome of one advertiser's fetch
+        
+        Args:
+            advertiser_id: The advertiser ID the result belongs to
+            result: Query result or None if the request failed
+            
+        Returns:
+            True if the result contains data records and should be kept
+        """
+        if not result:
+            self.logger.error(f"Failed to fetch data for advertiser {advertiser_id}")
+            return False
+        
+        # Check if actual data was retrieved
+        if self._check_data_retrieved(result, advertiser_id):
+            self.logger.info(f"Successfully fetched data for advertiser {advertiser_id}")
+            return True
+        
+        self.logger.warning(f"No data found for advertiser {advertiser_id} (empty result set)")
+        return False
+    
+    def _fetch_chunk(self, advertiser_ids: List[str], date_from: str, date_to: str,
+                     limiter: Optional[_TokenBucket]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Fetch ad insights for a chunk of advertisers, waiting on the shared rate limiter first
+        
+        Args:
+            advertiser_ids: Advertiser IDs to fetch in one request (aliased if more than one)
+            date_from: Start date (YYYY-MM-DD format)
+            date_to: End date (YYYY-MM-DD format)
+            limiter: Token bucket shared by all workers (None disables rate limiting)
+            
+        Returns:
+            Dict mapping each advertiser ID to its query result or None if failed
+        """
+        if limiter is not None:
+            limiter.acquire()
+        if len(advertiser_ids) == 1:
+            return {advertiser_ids[0]: self.get_ad_insights_by_day_single(advertiser_ids[0], date_from, date_to)}
+        return self.get_ad_insights_by_day_aliased_batch(advertiser_ids, date_from, date_to, chunk=len(advertiser_ids))
     
     def fetch_all_ad_insights(self, use_bulk: bool = False, delay_between_requests: float = 1.0, 
-                             date_from: str = "2020-06-01", date_to: str = "2020-10-30") -> List[Dict[str, Any]]:
+                             date_from: str = "2020-06-01", date_to: str = "2020-10-30",
+                             max_workers: int = 10, alias_batch_size: int = 1,
+                             use_async: bool = False,
+                             bulk_chunk_size: Optional[int] = None,
+                             date_chunk_days: Optional[int] = None) -> List[Dict[str, Any]]:
         """
         Fetch ad insights for all advertisers using either single requests or bulk
         
         Args:
             use_bulk: If True, use bulk query for all advertisers. If False, use individual queries
-            delay_between_requests: Delay in seconds between requests (only used for single mode)
+            delay_between_requests: Minimum spacing in seconds between request starts, enforced
+                by a token bucket shared across workers (only used for single mode, 0 disables)
             date_from: Start date (YYYY-MM-DD format)
             date_to: End date (YYYY-MM-DD format)
+            max_workers: Maximum number of concurrent requests (only used for single mode)
+            alias_batch_size: Number of advertisers aliased into each request (only used for
+                single mode, 1 sends one plain query per advertiser)
+            use_async: If True, run single mode through fetch_all_ad_insights_async and chunked
+                bulk mode through get_ad_insights_by_day_chunked_async, both over HTTP/2
+                (must not be called from inside a running event loop)
+            bulk_chunk_size: If set, bulk mode sends the advertiser IDs in requests of at most
+                this many instead of one request for all of them
+            date_chunk_days: If set, split the date range into windows of at most this many days
+                and fetch each separately, so a failed query only re-fetches its window and
+                windows entirely in the past stay cached for good
             
         Returns:
             List of results for all advertisers
         """
+        _check_concurrency(max_workers, "max_workers")
+        if date_chunk_days is not None:
+            all_results = []
+            for window_from, window_to in _date_windows(date_from, date_to, date_chunk_days):
+                self.logger.info(f"Fetching ad insights for {window_from} to {window_to}...")
+                all_results.extend(self.fetch_all_ad_insights(
+                    use_bulk=use_bulk,
+                    delay_between_requests=delay_between_requests,
+                    date_from=window_from,
+                    date_to=window_to,
+                    max_workers=max_workers,
+                    alias_batch_size=alias_batch_size,
+                    use_async=use_async,
+                    bulk_chunk_size=bulk_chunk_size
+                ))
+            return all_results
+        
+        if use_async and not use_bulk:
+            return asyncio.run(self.fetch_all_ad_insights_async(
+                delay_between_requests=delay_between_requests,
+                date_from=date_from,
+                date_to=date_to,
+                max_concurrency=max_workers,
+                alias_batch_size=alias_batch_size
+            ))
+        
+        if not use_bulk:
+            return self._fetch_all_ad_insights_threaded(delay_between_requests, date_from, date_to,
+                                                        max_workers, alias_batch_size)
+        
         # Step 1: Get all advertiser IDs
-        print("Fetching all advertiser IDs...")
+        self.logger.info("Fetching all advertiser IDs...")
         advertiser_ids = self.get_all_advertiser_ids()
         
         if not advertiser_ids:
-            print("No advertiser IDs found. Exiting.")
+            self.logger.warning("No advertiser IDs found. Exiting.")
             return []
         
-        print(f"Found {len(advertiser_ids)} advertiser IDs: {advertiser_ids}")
+        self.logger.info(f"Found {len(advertiser_ids)} advertiser IDs")
         
-        if use_bulk:
+        if use_bulk and bulk_chunk_size:
+            # Step 2a: Get ad insights in bulk requests of bulk_chunk_size advertisers each
+            self.logger.info(f"Fetching ad insights for {len(advertiser_ids)} advertisers in bulk chunks of {bulk_chunk_size}...")
+            if use_async:
+                results = asyncio.run(self.get_ad_insights_by_day_chunked_async(
+                    advertiser_ids, date_from, date_to, chunk_size=bulk_chunk_size, max_concurrency=max_workers
+                ))
+            else:
+                results = self.get_ad_insights_by_day_chunked(advertiser_ids, date_from, date_to, chunk_size=bulk_chunk_size)
+            self.logger.info(f"Fetched data from {len(results)} bulk chunks")
+            return results
+        else:
             # Step 2a: Get ad insights for all advertisers in one bulk query
-            print(f"Fetching ad insights for all {len(advertiser_ids)} advertisers in bulk...")
+            self.logger.info(f"Fetching ad insights for all {len(advertiser_ids)} advertisers in bulk...")
             result = self.get_ad_insights_by_day_bulk(advertiser_ids, date_from, date_to)
             
             if result:
                 # Check if actual data was retrieved
                 data_retrieved = self._check_data_retrieved(result, f"bulk query ({len(advertiser_ids)} advertisers)")
                 if data_retrieved:
-                    print(f"✓ Successfully fetched bulk data for all advertisers")
+                    self.logger.info("Successfully fetched bulk data for all advertisers")
                     return [result]
                 else:
-                    print(f"⚠ No data found in bulk query (empty result set)")
+                    self.logger.warning("No data found in bulk query (empty result set)")
                     return []
             else:
-                print(f"✗ Failed to fetch bulk data")
+                self.logger.error("Failed to fetch bulk data")
                 return []
-        else:
-            # Step 2b: Get ad insights for each advertiser ID individually
-            print("Fetching ad insights for each advertiser...")
-            all_results = []
+    
+    def _fetch_all_ad_insights_threaded(self, delay_between_requests: float, date_from: str, date_to: str,
+                                        max_workers: int, alias_batch_size: int) -> List[Dict[str, Any]]:
+        """
+        Single mode of fetch_all_ad_insights on a thread pool
+        
+        Insights requests are submitted as each page of advertiser IDs arrives rather than
+        after pagination finishes, so the first requests overlap with the remaining pages.
+        
+        Args:
+            delay_between_requests: Minimum spacing in seconds between request starts (0 disables)
+            date_from: Start date (YYYY-MM-DD format)
+            date_to: End date (YYYY-MM-DD format)
+            max_workers: Maximum number of concurrent requests
+            alias_batch_size: Number of advertisers aliased into each request
             
-            for i, advertiser_id in enumerate(advertiser_ids, 1):
-                print(f"Processing advertiser {i}/{len(advertiser_ids)}: {advertiser_id}")
-                result = self.get_ad_insights_by_day_single(advertiser_id, date_from, date_to)
-                
-                if result:
-                    # Check if actual data was retrieved
-                    data_retrieved = self._check_data_retrieved(result, advertiser_id)
-                    if data_retrieved:
-                        all_results.append(result)
-                        print(f"✓ Successfully fetched data for advertiser {advertiser_id}")
-                    else:
-                        print(f"⚠ No data found for advertiser {advertiser_id} (empty result set)")
+        Returns:
+            List of results for all advertisers, in advertiser order
+        """
+        self.logger.info(f"Fetching ad insights for each advertiser as IDs are paged in (max_workers={max_workers})...")
+        limiter = _TokenBucket(1.0 / delay_between_requests) if delay_between_requests > 0 else None
+        if max_workers > self._pool_size:
+            # Otherwise urllib3 discards the extra connections and workers reconnect on every request
+            self._setup_session(pool_size=max_workers)
+        advertiser_ids = []
+        results_by_id = {}
+        processed = 0
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = []
+            for chunk_ids in batched(self.iter_advertiser_ids(), alias_batch_size):
+                advertiser_ids.extend(chunk_ids)
+                futures.append(executor.submit(self._fetch_chunk, list(chunk_ids), date_from, date_to, limiter))
+            
+            if not advertiser_ids:
+                self.logger.warning("No advertiser IDs found. Exiting.")
+                return []
+            
+            self.logger.info(f"Found {len(advertiser_ids)} advertiser IDs")
+            
+            for future in as_completed(futures):
+                for advertiser_id, result in future.result().items():
+                    processed += 1
+                    self.logger.debug(f"Processed advertiser {processed}/{len(advertiser_ids)}: {advertiser_id}")
+                    if self._handle_advertiser_result(advertiser_id, result):
+                        results_by_id[advertiser_id] = result
+        
+        # Return results in the original advertiser order regardless of completion order
+        return [results_by_id[aid] for aid in advertiser_ids if aid in results_by_id]
+    
+    def _async_client(self, max_concurrency: int) -> httpx.AsyncClient:
+        """HTTP/2 client carrying the session headers, so concurrent requests share one connection"""
+        # Connection-specific headers such as Connection are not allowed over HTTP/2
+        headers = {k: v for k, v in self.session.headers.items() if k.lower() != "connection"}
+        limits = httpx.Limits(max_connections=max_concurrency, max_keepalive_connections=max_concurrency)
+        return httpx.AsyncClient(http2=True, headers=headers, timeout=30, limits=limits)
+    
+    async def _async_prewarm(self, client: httpx.AsyncClient):
+        """
+        Open the HTTP/2 connection with a trivial query before the concurrent requests start
+        
+        Without this every request gathered at once finds the pool empty, so the first wave
+        pays the DNS/TCP/TLS setup on the critical path. Failures are left to the real requests.
+        """
+        try:
+            await client.post(self.endpoint, content=_encode_payload(self._TEST_CONNECTION_QUERY, {}), timeout=5)
+        except httpx.HTTPError as e:
+            self.logger.debug(f"Connection prewarm failed: {e}")
+    
+    async def get_ad_insights_by_day_chunked_async(self, advertiser_ids: List[str],
+                                                   date_from: str = "2020-06-01",
+                                                   date_to: str = "2020-10-30",
+                                                   chunk_size: int = 25,
+                                                   max_concurrency: int = 8) -> List[Dict[str, Any]]:
+        """
+        Concurrent variant of get_ad_insights_by_day_chunked, multiplexed over HTTP/2
+        
+        Args:
+            advertiser_ids: List of advertiser IDs to fetch insights for
+            date_from: Start date (YYYY-MM-DD format)
+            date_to: End date (YYYY-MM-DD format)
+            chunk_size: Maximum number of advertiser IDs per request
+            max_concurrency: Maximum number of requests in flight
+            
+        Returns:
+            List of successful query results, one per chunk that returned data
+        """
+        # Semaphore(0) would leave every request waiting forever
+        _check_concurrency(max_concurrency, "max_concurrency")
+        semaphore = asyncio.Semaphore(max_concurrency)
+        chunks = [list(chunk_ids) for chunk_ids in batched(advertiser_ids, chunk_size)]
+        
+        async def fetch(client: httpx.AsyncClient, chunk_ids: List[str]) -> Optional[Dict[str, Any]]:
+            variables = {"ids": chunk_ids, "dateFrom": date_from, "dateTo": date_to}
+            async with semaphore:
+                return await self.async_execute_query(client, self._insights_query, variables)
+        
+        async with self._async_client(max_concurrency) as client:
+            await self._async_prewarm(client)
+            chunk_results = await asyncio.gather(*[fetch(client, chunk_ids) for chunk_ids in chunks])
+        
+        results = []
+        for chunk_ids, result in zip(chunks, chunk_results):
+            if result and self._check_data_retrieved(result, f"bulk chunk ({len(chunk_ids)} advertisers)"):
+                results.append(result)
+            elif not result:
+                self.logger.error(f"Failed to fetch bulk chunk starting at advertiser {chunk_ids[0]}")
+        return results
+    
+    async def async_execute_query(self, client: httpx.AsyncClient, query: str,
+                                  variables: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Execute a GraphQL query on an async HTTP client
+        
+        Args:
+            client: Open httpx.AsyncClient carrying the session headers
+            query: GraphQL query string
+            variables: Optional variables for the query
+            
+        Returns:
+            Response data or None if failed
+        """
+        variables = variables or {}
+        if self._caching:
+            key = self._cache_key(query, variables)
+            cached = self._cached_response(key, variables)
+            if cached is not None:
+                return cached
+        
+        payload = _encode_payload(query, variables)
+        for attempt in range(_RETRY_TOTAL + 1):
+            result = await self._async_post(client, payload)
+            if result is None or not _is_transient_error(result) or attempt == _RETRY_TOTAL:
+                break
+            delay = _retry_delay(None, attempt)
+            self.logger.warning(f"GraphQL request returned a transient error, retrying in {delay:.2f}s "
+                                f"(attempt {attempt + 1}/{_RETRY_TOTAL})")
+            await asyncio.sleep(delay)
+        
+        if self._caching:
+            self._cache_result(key, variables, result)
+        return result
+    
+    async def _async_post(self, client: httpx.AsyncClient, payload: bytes) -> Optional[Dict[str, Any]]:
+        """
+        POST an encoded GraphQL payload on an async HTTP client
+        
+        Args:
+            client: Open httpx.AsyncClient carrying the session headers
+            payload: Request body from _encode_payload
+            
+        Returns:
+            Decoded response or None if the request failed
+        """
+        body, headers = self._request_body(payload)
+        try:
+            # Retry throttling, server errors and transport failures like the sync session does
+            for attempt in range(_RETRY_TOTAL + 1):
+                response = None
+                try:
+                    response = await client.post(self.endpoint, content=body, headers=headers)
+                except httpx.TransportError:
+                    if attempt == _RETRY_TOTAL:
+                        raise
                 else:
-                    print(f"✗ Failed to fetch data for advertiser {advertiser_id}")
+                    if response.status_code not in _RETRY_STATUSES or attempt == _RETRY_TOTAL:
+                        break
+                delay = _retry_delay(response, attempt)
+                self.logger.warning(
+                    f"GraphQL request {'failed' if response is None else f'returned {response.status_code}'}, "
+                    f"retrying in {delay:.2f}s (attempt {attempt + 1}/{_RETRY_TOTAL})"
+                )
+                await asyncio.sleep(delay)
+            
+            response.raise_for_status()
+            return orjson.loads(response.content)
+        except httpx.HTTPError as e:
+            self.logger.error(f"GraphQL request failed: {e}")
+            if isinstance(e, httpx.HTTPStatusError):
+                self.logger.error(f"Response status: {e.response.status_code}")
+                self.logger.debug(f"Response body: {e.response.text}")
+            return None
+        except orjson.JSONDecodeError as e:
+            self.logger.error(f"Failed to decode GraphQL response: {e}")
+            return None
+    
+    async def _async_fetch_chunk(self, client: httpx.AsyncClient, semaphore: asyncio.Semaphore,
+                                 advertiser_ids: List[str], date_from: str, date_to: str,
+                                 limiter: Optional[_TokenBucket]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Fetch ad insights for a chunk of advertisers as one aliased request
+        
+        Args:
+            client: Open httpx.AsyncClient carrying the session headers
+            semaphore: Caps the number of requests in flight
+            advertiser_ids: Advertiser IDs to alias into the request
+            date_from: Start date (YYYY-MM-DD format)
+            date_to: End date (YYYY-MM-DD format)
+            limiter: Token bucket shared by all coroutines (None disables rate limiting)
+            
+        Returns:
+            Dict mapping each advertiser ID to its query result or None if failed
+        """
+        async with semaphore:
+            if limiter is not None:
+                await limiter.acquire_async()
+            query, variables = self._build_aliased_batch_query(advertiser_ids, date_from, date_to)
+            result = await self.async_execute_query(client, query, variables)
+        return self._split_aliased_batch_result(result, advertiser_ids)
+    
+    async def fetch_all_ad_insights_async(self, delay_between_requests: float = 0.0,
+                                          date_from: str = "2020-06-01", date_to: str = "2020-10-30",
+                                          max_concurrency: int = 50,
+                                          alias_batch_size: int = 1) -> List[Dict[str, Any]]:
+        """
+        Fetch ad insights for all advertisers concurrently over a single HTTP/2 connection
+        
+        Args:
+            delay_between_requests: Minimum spacing in seconds between request starts (0 disables)
+            date_from: Start date (YYYY-MM-DD format)
+            date_to: End date (YYYY-MM-DD format)
+            max_concurrency: Maximum number of requests in flight
+            alias_batch_size: Number of advertisers aliased into each request
+            
+        Returns:
+            List of results for all advertisers
+        """
+        # Semaphore(0) would leave every request waiting forever
+        _check_concurrency(max_concurrency, "max_concurrency")
+        self.logger.info("Fetching all advertiser IDs...")
+        advertiser_ids = self.get_all_advertiser_ids()
+        
+        if not advertiser_ids:
+            self.logger.warning("No advertiser IDs found. Exiting.")
+            return []
+        
+        self.logger.info(f"Found {len(advertiser_ids)} advertiser IDs")
+        self.logger.info(f"Fetching ad insights for each advertiser asynchronously (max_concurrency={max_concurrency})...")
+        
+        limiter = _TokenBucket(1.0 / delay_between_requests) if delay_between_requests > 0 else None
+        semaphore = asyncio.Semaphore(max_concurrency)
+        chunks = [advertiser_ids[i:i + alias_batch_size] for i in range(0, len(advertiser_ids), alias_batch_size)]
+        
+        async with self._async_client(max_concurrency) as client:
+            await self._async_prewarm(client)
+            chunk_results = await asyncio.gather(*[
+                self._async_fetch_chunk(client, semaphore, chunk_ids, date_from, date_to, limiter)
+                for chunk_ids in chunks
+            ])
+        
+        all_results = []
+        for chunk_result in chunk_results:
+            for advertiser_id, result in chunk_result.items():
+                if self._handle_advertiser_result(advertiser_id, result):
+                    all_results.append(result)
+        
+        return all_results
+    
+    @staticmethod
+    def _iter_edges(results: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """Yield every insights edge across all responses, skipping responses without records"""
+        for result in results:
+            try:
+                edges = result['data']['campaignGroupInsight']['records']['edges']
+            except (KeyError, TypeError):
+                continue
+            yield from edges or ()
+    
+    @classmethod
+    def iter_flat_records(cls, results: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """
+        Flatten insights responses into one record per ad per day
+        
+        Args:
+            results: GraphQL responses as returned by fetch_all_ad_insights
+            
+        Yields:
+            Flat dict per edge with ID/name columns and the original metric names
+        """
+        bad_edges = 0
+        for edge in cls._iter_edges(results):
+            try:
+                node = edge['node']
+                attributes = node['attributes']
+                ad = attributes['ad']
+                campaign = ad['campaign']
+                campaign_group = campaign['campaignGroup']
+                metrics = node['metrics']
                 
-                # Add delay between requests to avoid rate limiting
-                if i < len(advertiser_ids):  # Don't delay after the last request
-                    time.sleep(delay_between_requests)
+                # Extract data from the nested structure
+                # Using .get() with default None to preserve NULLs
+                record = {
+                    # IDs and names
+                    'ad_id': ad['id'],
+                    'ad_name': ad['name'],
+                    'date': attributes['date'],
+                    'campaign_id': campaign['id'],
+                    'campaign_name': campaign['name'],
+                    'campaign_group_id': campaign_group['id'],
+                    'campaign_group_name': campaign_group['name'],
+                    
+                    # Goal type information
+                    'goalType': campaign.get('goalType'),
+                    
+                    # Metrics - preserve original metric names from API
+                    **{name: metrics.get(name) for name in cls.METRIC_COLUMNS}
+                }
+            except (KeyError, TypeError, AttributeError):
+                bad_edges += 1
+                continue
+            yield record
+        
+        if bad_edges:
+            logging.getLogger('stackadapt').warning(f"Skipped {bad_edges} malformed insight edges")
+    
+    @classmethod
+    def flatten_to_columns(cls, results: Iterable[Dict[str, Any]]) -> Dict[str, List[Any]]:
+        """
+        Flatten insights responses into column arrays (one list per output column)
+        
+        Building columns directly avoids a dict per row and lets pandas/pyarrow
+        construct each column in one pass.
+        
+        Args:
+            results: GraphQL responses as returned by fetch_all_ad_insights
             
-            return all_results
+        Returns:
+            Dict mapping each name in RECORD_COLUMNS to its list of values
+        """
+        columns = {name: [] for name in cls.RECORD_COLUMNS}
+        metric_columns = [(name, columns[name]) for name in cls.METRIC_COLUMNS]
+        ad_ids, ad_names, dates = columns['ad_id'], columns['ad_name'], columns['date']
+        campaign_ids, campaign_names = columns['campaign_id'], columns['campaign_name']
+        group_ids, group_names = columns['campaign_group_id'], columns['campaign_group_name']
+        goal_types = columns['goalType']
+        
+        # Plain subscripts and list.append are kept on purpose: they specialize well in the
+        # interpreter, and itemgetter/tuple-transpose or pre-bound append variants measured
+        # 15-80% slower on 100k edges
+        bad_edges = 0
+        for edge in cls._iter_edges(results):
+            # Read every field before appending so a malformed edge never leaves the columns ragged
+            try:
+                node = edge['node']
+                attributes = node['attributes']
+                ad = attributes['ad']
+                campaign = ad['campaign']
+                campaign_group = campaign['campaignGroup']
+                get_metric = node['metrics'].get
+                ad_id, ad_name, day = ad['id'], ad['name'], attributes['date']
+                campaign_id, campaign_name = campaign['id'], campaign['name']
+                group_id, group_name = campaign_group['id'], campaign_group['name']
+                goal_type = campaign.get('goalType')
+            except (KeyError, TypeError, AttributeError):
+                bad_edges += 1
+                continue
+            
+            ad_ids.append(ad_id)
+            ad_names.append(ad_name)
+            dates.append(day)
+            campaign_ids.append(campaign_id)
+            campaign_names.append(campaign_name)
+            group_ids.append(group_id)
+            group_names.append(group_name)
+            goal_types.append(goal_type)
+            for name, values in metric_columns:
+                values.append(get_metric(name))
+        
+        if bad_edges:
+            logging.getLogger('stackadapt').warning(f"Skipped {bad_edges} malformed insight edges")
+        
+        return columns
+    
+    @classmethod
+    def flatten_to_arrow(cls, results: Iterable[Dict[str, Any]], loaded_at: Optional[datetime] = None,
+                         source: str = 'stackadapt_graphql_api') -> pa.Table:
+        """
+        Flatten insights responses from all advertisers into a single typed Arrow table
+        
+        Args:
+            results: GraphQL responses as returned by fetch_all_ad_insights
+            loaded_at: Timestamp written to every row (defaults to the current UTC time)
+            source: Source label written to every row
+            
+        Returns:
+            pa.Table with one row per ad per day, typed by ADS_PERFORMANCE_ARROW_SCHEMA
+        """
+        return columns_to_arrow(cls.flatten_to_columns(results), loaded_at or datetime.now(timezone.utc), source)
     
     def test_connection(self) -> bool:
         """
@@ -386,47 +1533,85 @@ class StackAdaptClient:
         Returns:
             True if connection is successful, False otherwise
         """
-        query = """
-            query TestConnection {
-              __schema {
-                types {
-                  name
-                }
-              }
-            }
-        """
-        
-        result = self.execute_query(query)
+        result = self.execute_query(self._TEST_CONNECTION_QUERY, use_cache=False)
         return result is not None
 
 
 def main():
     """Example usage of the StackAdaptClient"""
+    parser = argparse.ArgumentParser(description='Fetch StackAdapt ad insights for all advertisers')
+    parser.add_argument('--out', type=str, default=None,
+                        help='Write results as NDJSON to this path instead of stdout')
+    parser.add_argument('--parquet', action='store_true', default=False,
+                        help='Write --out as a flat Parquet table (one row per ad per day) instead of NDJSON')
+    parser.add_argument('--async', dest='use_async', action='store_true', default=False,
+                        help='Fetch advertisers concurrently on one asyncio event loop over HTTP/2')
+    parser.add_argument('--max-concurrency', type=int, default=8,
+                        help='Maximum advertiser requests in flight (default: 8)')
+    parser.add_argument('--delay', type=float, default=1.0,
+                        help='Minimum seconds between request starts, 0 disables (default: 1.0)')
+    parser.add_argument('--alias-batch-size', type=int, default=1,
+                        help='Advertisers coalesced into each request as aliased fields (default: 1)')
+    parser.add_argument('--pretty', action='store_true', default=False,
+                        help='Indent the JSON written to stdout (default: one compact line per advertiser)')
+    parser.add_argument('--no-cache', action='store_true', default=False,
+                        help='Skip the on-disk response cache and always query the API')
+    args = parser.parse_args()
+    if args.parquet and not args.out:
+        parser.error('--parquet requires --out')
+    
     try:
-        # Initialize the client
-        client = StackAdaptClient()
+        # Initialize the client (cache_dir=None disables the response cache); Parquet output
+        # only needs the fields the flatten helpers read
+        client = StackAdaptClient(
+            cache_dir=None if args.no_cache else ".sa_cache",
+            full_selection=not args.parquet
+        )
         
         # Test connection
-        print("Testing connection to StackAdapt API...")
+        logger.info("Testing connection to StackAdapt API...")
         if not client.test_connection():
-            print("Failed to connect to StackAdapt API. Please check your credentials.")
+            logger.error("Failed to connect to StackAdapt API. Please check your credentials.")
             return
         
-        print("Connection successful!")
+        logger.info("Connection successful!")
         
         # Fetch all ad insights (use use_bulk=True for bulk mode)
-        all_results = client.fetch_all_ad_insights(use_bulk=False)
+        all_results = client.fetch_all_ad_insights(
+            use_bulk=False,
+            delay_between_requests=args.delay,
+            max_workers=args.max_concurrency,
+            alias_batch_size=args.alias_batch_size,
+            use_async=args.use_async
+        )
         
         # Display results
         if all_results:
-            print(f"\nSuccessfully processed {len(all_results)} advertisers")
-            print("Combined Ad Insights Response:")
-            print(json.dumps(all_results, indent=2))
+            logger.info(f"Successfully processed {len(all_results)} advertisers")
+            if args.parquet:
+                table = client.flatten_to_arrow(all_results)
+                pq.write_table(table, args.out)
+                logger.info(f"Wrote {table.num_rows} rows to {args.out}")
+            elif args.out:
+                # One compact JSON document per line, written as each result is serialized
+                with open(args.out, "wb") as f:
+                    for result in all_results:
+                        f.write(orjson.dumps(result))
+                        f.write(b"\n")
+                logger.info(f"Wrote {len(all_results)} results to {args.out}")
+            else:
+                logger.info("Combined Ad Insights Response:")
+                sys.stdout.flush()
+                option = orjson.OPT_INDENT_2 if args.pretty else 0
+                for result in all_results:
+                    sys.stdout.buffer.write(orjson.dumps(result, option=option))
+                    sys.stdout.buffer.write(b"\n")
+                sys.stdout.buffer.flush()
         else:
-            print("Failed to get ad insights from any advertiser")
+            logger.error("Failed to get ad insights from any advertiser")
             
     except Exception as e:
-        print(f"Error: {e}")
+        logger.error(f"Error: {e}")
 
 
 if __name__ == "__main__":
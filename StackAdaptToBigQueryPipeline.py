@@ -11,16 +11,20 @@ import pandas as pd
 from datetime import datetime, timedelta, timezone
 from typing import List, Dict, Optional
 import logging
+import re
 from dotenv import load_dotenv
 import time
 import argparse
-import pandas_gbq
+import pyarrow as pa
+import pyarrow.compute as pc
+from google.cloud import bigquery
+from google.cloud.exceptions import NotFound
 
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 # Import our custom clients
-from StackAdaptClient import StackAdaptClient
+from StackAdaptClient import StackAdaptClient, INTEGER_METRIC_COLUMNS, ADS_PERFORMANCE_ARROW_SCHEMA, columns_to_arrow
 from BigQueryClient import BigQueryClient
 
 # Configure logging
@@ -33,6 +37,80 @@ logger = logging.getLogger(__name__)
 # Load environment variables
 load_dotenv()
 
+# Explicit schema for the ads performance tables
+ADS_PERFORMANCE_SCHEMA = [
+    bigquery.SchemaField('ad_id', 'STRING'),
+    bigquery.SchemaField('ad_name', 'STRING'),
+    bigquery.SchemaField('date', 'DATE'),
+    bigquery.SchemaField('campaign_id', 'STRING'),
+    bigquery.SchemaField('campaign_name', 'STRING'),
+    bigquery.SchemaField('campaign_group_id', 'STRING'),
+    bigquery.SchemaField('campaign_group_name', 'STRING'),
+    bigquery.SchemaField('goalType', 'STRING'),
+    *[bigquery.SchemaField(col, 'INT64') for col in INTEGER_METRIC_COLUMNS],
+    bigquery.SchemaField('frequency', 'FLOAT64'),
+    bigquery.SchemaField('cost', 'FLOAT64'),  # Cents; may be fractional
+    bigquery.SchemaField('_loaded_at', 'TIMESTAMP'),
+    bigquery.SchemaField('_source', 'STRING'),
+]
+
+# Legacy type names returned in table schemas, mapped to the standard SQL names used in CAST
+_STANDARD_SQL_TYPES = {'INTEGER': 'INT64', 'FLOAT': 'FLOAT64', 'BOOLEAN': 'BOOL', 'RECORD': 'STRUCT'}
+
+
+def _standard_sql_type(field_type: str) -> str:
+    """Standard SQL name for a schema field type"""
+    return _STANDARD_SQL_TYPES.get(field_type.upper(), field_type.upper())
+
+
+# Table names that are safe to interpolate into SQL (names cannot be query parameters);
+# \Z rather than $, which would also accept a trailing newline
+TABLE_NAME_PATTERN = re.compile(r'\A[A-Za-z0-9_-]{1,1024}\Z')
+
+
+def split_by_date(table: pa.Table, shard_days: int) -> List[pa.Table]:
+    """
+    Split a table into consecutive date ranges of shard_days days each
+    
+    Args:
+        table: Table with a date32 'date' column
+        shard_days: Number of days per shard
+        
+    Returns:
+        List of non-empty tables, one per date range, oldest first, followed by one
+        shard of the rows without a date (if any) so every input row is loaded once
+        
+    Raises:
+        ValueError: If shard_days is less than 1
+    """
+    if shard_days < 1:
+        raise ValueError(f"Shards must span at least 1 day, got {shard_days}")
+    
+    # Null dates match neither side of the range comparisons, so they get their own shard
+    undated = table.filter(pc.is_null(table['date']))
+    table = table.filter(pc.is_valid(table['date']))
+    
+    shards = []
+    if table.num_rows:
+        bounds = pc.min_max(table['date']).as_py()
+        shards.extend(_date_range_shards(table, bounds['min'], bounds['max'], shard_days))
+    if undated.num_rows:
+        shards.append(undated)
+    return shards
+
+
+def _date_range_shards(table: pa.Table, shard_start, last_date, shard_days: int) -> List[pa.Table]:
+    """Non-empty shards of shard_days days each covering shard_start through last_date"""
+    shards = []
+    while shard_start <= last_date:
+        shard_end = shard_start + timedelta(days=shard_days)
+        mask = pc.and_(pc.greater_equal(table['date'], shard_start), pc.less(table['date'], shard_end))
+        shard = table.filter(mask)
+        if shard.num_rows:
+            shards.append(shard)
+        shard_start = shard_end
+    return shards
+
 
 class StackAdaptToBigQueryPipeline:
     """Pipeline for syncing StackAdapt ads data to BigQuery"""
@@ -57,12 +135,54 @@ class StackAdaptToBigQueryPipeline:
             raise ValueError("Project ID must be specified or available in credentials")
         
         # Initialize StackAdapt client
-        self.stackadapt_client = StackAdaptClient()
+        # Each sync reads every response once, so caching them would only pin the raw
+        # response trees in memory or (on Cloud Run's in-memory filesystem) on disk
+        self.stackadapt_client = StackAdaptClient(cache_dir=None, full_selection=False, memoize=False)
         
         logger.info(f"Initialized pipeline with project: {self.project_id}, dataset: {self.dataset_id}")
     
+    def _checked_table_name(self, table_name: str) -> str:
+        """
+        Validate a table name before it is interpolated into SQL
+        
+        Args:
+            table_name: Unqualified table name
+            
+        Returns:
+            str: The table name, unchanged
+            
+        Raises:
+            ValueError: If the name contains characters outside TABLE_NAME_PATTERN
+        """
+        if not TABLE_NAME_PATTERN.fullmatch(table_name):
+            raise ValueError(f"Invalid table name: {table_name!r}")
+        return table_name
+    
+    def run_query(self, query: str, query_parameters: Optional[List] = None) -> bigquery.QueryJob:
+        """
+        Submit a query with the pipeline's dataset as the default dataset
+        
+        Unqualified table names in the SQL resolve to project_id.dataset_id, so the
+        query text stays the same across projects and datasets.
+        
+        Args:
+            query: SQL query string
+            query_parameters: Optional bigquery query parameters referenced as @name
+            
+        Returns:
+            bigquery.QueryJob: The submitted (not yet finished) query job
+        """
+        job_config = bigquery.QueryJobConfig(
+            default_dataset=f"{self.project_id}.{self.dataset_id}",
+            query_parameters=query_parameters or []
+        )
+        return self.bq_client.query(query, job_config=job_config)
+    
     def sync_ads_performance(self, temp_table_name: str = "stackadapt_ads_temp", 
-                           use_bulk: bool = True, days_back: int = 30) -> int:
+                           use_bulk: bool = True, days_back: int = 30,
+                           use_async: bool = False, max_concurrency: int = 8,
+                           shard_days: Optional[int] = None,
+                           now: Optional[datetime] = None) -> int:
         """
         Fetch ads performance data from StackAdapt and sync to a temporary BigQuery table
         
@@ -70,13 +190,25 @@ class StackAdaptToBigQueryPipeline:
             temp_table_name: Name of the temporary BigQuery table
             use_bulk: Whether to use bulk API call (True) or individual calls (False)
             days_back: Number of days back from today to fetch data (default: 30)
+            use_async: Whether to overlap the per-advertiser requests on one asyncio event loop
+                (individual mode only; must not be called from inside a running event loop)
+            max_concurrency: Maximum number of per-advertiser requests in flight (individual mode only)
+            shard_days: If set, upload the temp table as parallel load jobs of this many days each
+                (worth it for long backfills; one load job is cheaper for the default window)
+            now: Timezone-aware time the date range ends at and the load is stamped with
+                (defaults to the current UTC time); pass it to report the same range as synced
             
         Returns:
             int: Number of records synced
         """
-        # Calculate date range
-        date_to = datetime.now().strftime("%Y-%m-%d")
-        date_from = (datetime.now() - timedelta(days=days_back)).strftime("%Y-%m-%d")
+        # Reject bad shard sizes before the temp table is dropped
+        if shard_days is not None and shard_days < 1:
+            raise ValueError(f"shard_days must be at least 1, got {shard_days}")
+        
+        # Calculate date range from a single clock read, which is also the load timestamp
+        now = now or datetime.now(timezone.utc)
+        date_to = now.strftime("%Y-%m-%d")
+        date_from = (now - timedelta(days=days_back)).strftime("%Y-%m-%d")
         
         logger.info(f"Starting StackAdapt ads performance sync (bulk mode: {use_bulk})...")
         logger.info(f"Date range: {date_from} to {date_to} ({days_back} days back)")
@@ -91,7 +223,13 @@ class StackAdaptToBigQueryPipeline:
             
             # Fetch all ad insights from StackAdapt
             logger.info("Fetching ad insights from StackAdapt...")
-            all_results = self.stackadapt_client.fetch_all_ad_insights(use_bulk=use_bulk, date_from=date_from, date_to=date_to)
+            all_results = self.stackadapt_client.fetch_all_ad_insights(
+                use_bulk=use_bulk,
+                date_from=date_from,
+                date_to=date_to,
+                max_workers=max_concurrency,
+                use_async=use_async
+            )
             
             if not all_results:
                 logger.warning("No data retrieved from StackAdapt")
@@ -99,162 +237,126 @@ class StackAdaptToBigQueryPipeline:
             
             logger.info(f"Retrieved {len(all_results)} result sets from StackAdapt")
             
-            # Flatten the nested GraphQL response into a list of records
-            records = []
-            
-            for result in all_results:
-                if (result and 'data' in result and 
-                    'campaignGroupInsight' in result['data'] and
-                    'records' in result['data']['campaignGroupInsight']):
-                    
-                    edges = result['data']['campaignGroupInsight']['records']['edges']
-                    
-                    for edge in edges:
-                        node = edge['node']
-                        
-                        # Extract data from the nested structure
-                        # Using .get() with default None to preserve NULLs
-                        record = {
-                            # IDs and names
-                            'ad_id': node['attributes']['ad']['id'],
-                            'ad_name': node['attributes']['ad']['name'],
-                            'date': node['attributes']['date'],
-                            'campaign_id': node['attributes']['ad']['campaign']['id'],
-                            'campaign_name': node['attributes']['ad']['campaign']['name'],
-                            'campaign_group_id': node['attributes']['ad']['campaign']['campaignGroup']['id'],
-                            'campaign_group_name': node['attributes']['ad']['campaign']['campaignGroup']['name'],
-                            
-                            # Goal type information
-                            'goalType': node['attributes']['ad']['campaign'].get('goalType'),
-                            
-                            # Metrics - preserve original metric names from API
-                            'clicks': node['metrics'].get('clicks'),
-                            'clickConversions': node['metrics'].get('clickConversions'),
-                            'engagements': node['metrics'].get('engagements'),
-                            'videoStarts': node['metrics'].get('videoStarts'),
-                            'videoQ1Playbacks': node['metrics'].get('videoQ1Playbacks'),
-                            'videoQ2Playbacks': node['metrics'].get('videoQ2Playbacks'),
-                            'videoQ3Playbacks': node['metrics'].get('videoQ3Playbacks'),
-                            'videoCompletions': node['metrics'].get('videoCompletions'),
-                            'impressions': node['metrics'].get('impressions'),
-                            'frequency': node['metrics'].get('frequency'),
-                            'cost': node['metrics'].get('cost')  # Keep cost in original format (cents)
-                        }
-                        
-                        records.append(record)
-            
-            logger.info(f"Processed {len(records)} individual ad performance records")
-            
-            if not records:
+            # Flatten the nested GraphQL responses from all advertisers into column arrays
+            columns = self.stackadapt_client.flatten_to_columns(all_results)
+            record_count = len(columns['ad_id'])
+            # Release the nested responses before the Arrow table and Parquet file are built
+            del all_results
+            
+            logger.info(f"Processed {record_count} individual ad performance records")
+            
+            if not record_count:
                 logger.warning("No individual records found in the response data")
                 return 0
             
-            # Convert to DataFrame
-            df = pd.DataFrame(records)
-            
-            # Convert date column to datetime
-            if 'date' in df.columns:
-                df['date'] = pd.to_datetime(df['date'])
+            # Build a typed Arrow table straight from the column arrays (no pandas round trip)
+            table = columns_to_arrow(
+                columns,
+                loaded_at=now,
+                source='stackadapt_graphql_api'
+            )
             
-            # Add metadata columns
-            df['_loaded_at'] = pd.Timestamp.now(tz='UTC')
-            df['_source'] = 'stackadapt_graphql_api'
+            # Fully qualified table ID for the load job
+            table_id = f"{self.project_id}.{self.dataset_id}.{temp_table_name}"
             
-            # Table ID for pandas-gbq
-            table_id = f"{self.dataset_id}.{temp_table_name}"
+            # Load to BigQuery as Parquet with an explicit schema
+            logger.info(f"Loading {table.num_rows} records to {table_id}")
+            logger.info(f"Columns: {table.column_names}")
             
-            # Load to BigQuery using pandas-gbq
-            logger.info(f"Loading {len(df)} records to {self.project_id}.{table_id}")
-            logger.info(f"Columns: {list(df.columns)}")
+            # Drop the previous temp table so a change in partitioning/clustering never blocks the load
+            self.bq_client.client.delete_table(table_id, not_found_ok=True)
             
-            # Use pandas-gbq to load data
-            pandas_gbq.to_gbq(
-                df,
-                table_id,
-                project_id=self.project_id,
-                if_exists='replace',  # Replace the temp table
-                progress_bar=True
+            # Partition by date and cluster by ad_id so the merge only scans the loaded days
+            time_partitioning = bigquery.TimePartitioning(
+                type_=bigquery.TimePartitioningType.DAY,
+                field='date'
             )
             
-            logger.info(f"Successfully loaded {len(df)} performance records to BigQuery temp table")
+            if shard_days:
+                # Create the partitioned table up front so the shard loads can append concurrently
+                temp_table = bigquery.Table(table_id, schema=ADS_PERFORMANCE_SCHEMA)
+                temp_table.time_partitioning = time_partitioning
+                temp_table.clustering_fields = ['ad_id']
+                self.bq_client.client.create_table(temp_table)
+                
+                shards = split_by_date(table, shard_days)
+                logger.info(f"Uploading {len(shards)} shards of up to {shard_days} days each")
+                job_config = bigquery.LoadJobConfig(
+                    schema=ADS_PERFORMANCE_SCHEMA,
+                    write_disposition=bigquery.WriteDisposition.WRITE_APPEND
+                )
+                self.bq_client.load_arrow_tables_parallel(shards, table_id, job_config=job_config)
+            else:
+                job_config = bigquery.LoadJobConfig(
+                    schema=ADS_PERFORMANCE_SCHEMA,
+                    write_disposition=bigquery.WriteDisposition.WRITE_TRUNCATE,  # Replace the temp table
+                    time_partitioning=time_partitioning,
+                    clustering_fields=['ad_id']
+                )
+                self.bq_client.load_table_from_arrow(table, table_id, job_config=job_config).result()
             
-            # Log sample data
-            if len(df) > 0:
+            logger.info(f"Successfully loaded {table.num_rows} performance records to BigQuery temp table")
+            
+            # Sample and summary logging is skipped entirely unless INFO is enabled
+            if logger.isEnabledFor(logging.INFO):
                 sample_cols = ['date', 'ad_name', 'campaign_name', 'impressions', 'clicks', 'cost']
-                available_cols = [col for col in sample_cols if col in df.columns]
-                logger.info(f"Sample performance data: {df[available_cols].iloc[0].to_dict()}")
-            
-            # Show summary statistics
-            logger.info("\nSummary statistics:")
-            if 'cost' in df.columns:
-                # Convert cost to numeric, coercing errors to NaN
-                df['cost'] = pd.to_numeric(df['cost'], errors='coerce')
-                total_cost_cents = df['cost'].sum()
-                if pd.notna(total_cost_cents):
-                    logger.info(f"Total cost: {total_cost_cents:,.0f} cents (${total_cost_cents/100:,.2f})")
-            if 'impressions' in df.columns:
-                df['impressions'] = pd.to_numeric(df['impressions'], errors='coerce')
-                total_impressions = df['impressions'].sum()
-                if pd.notna(total_impressions):
-                    logger.info(f"Total impressions: {total_impressions:,.0f}")
-            if 'clicks' in df.columns:
-                df['clicks'] = pd.to_numeric(df['clicks'], errors='coerce')
-                total_clicks = df['clicks'].sum()
-                if pd.notna(total_clicks):
-                    logger.info(f"Total clicks: {total_clicks:,.0f}")
-            if 'clickConversions' in df.columns:
-                df['clickConversions'] = pd.to_numeric(df['clickConversions'], errors='coerce')
-                total_conversions = df['clickConversions'].sum()
-                if pd.notna(total_conversions):
-                    logger.info(f"Total conversions: {total_conversions:,.0f}")
-            
-            return len(df)
+                logger.info(f"Sample performance data: {table.select(sample_cols).slice(0, 1).to_pylist()[0]}")
+                
+                # Metrics are already typed, so each total is one vectorized sum with no coercion
+                totals = {col: pc.sum(table[col]).as_py() for col in ('cost', 'impressions', 'clicks', 'clickConversions')}
+                
+                logger.info("\nSummary statistics:")
+                if totals['cost'] is not None:
+                    logger.info(f"Total cost: {totals['cost']:,.0f} cents (${totals['cost']/100:,.2f})")
+                for col, label in (('impressions', 'impressions'), ('clicks', 'clicks'), ('clickConversions', 'conversions')):
+                    if totals[col] is not None:
+                        logger.info(f"Total {label}: {totals[col]:,.0f}")
+            
+            return table.num_rows
             
         except Exception as e:
             logger.error(f"Error syncing StackAdapt ads performance: {str(e)}")
             raise
     
-    def get_table_info(self, table_name: str) -> Dict:
+    def _column_types(self, table_name: str) -> Optional[Dict[str, str]]:
         """
-        Get information about a BigQuery table using pandas-gbq
+        Standard SQL type of each column of a table in this dataset
         
         Args:
             table_name: Name of the table
             
         Returns:
-            Dict with table information
+            Dict mapping column name to type (e.g. 'DATE', 'INT64'), or None if the table does not exist
         """
         try:
-            # Use INFORMATION_SCHEMA for better compatibility
-            query = f"""
-            SELECT 
-                table_id as table_name,
-                creation_time,
-                TIMESTAMP_MILLIS(last_modified_time) as last_modified_time,
-                row_count,
-                size_bytes
-            FROM `{self.project_id}.{self.dataset_id}.__TABLES__`
-            WHERE table_id = '{table_name}'
-            """
+            table = self.bq_client.client.get_table(f"{self.project_id}.{self.dataset_id}.{table_name}")
+        except NotFound:
+            return None
+        return {field.name: _standard_sql_type(field.field_type) for field in table.schema}
+    
+    def get_table_info(self, table_name: str) -> Dict:
+        """
+        Get information about a BigQuery table from the tables metadata API
+        
+        Args:
+            table_name: Name of the table
             
-            result = pandas_gbq.read_gbq(
-                query,
-                project_id=self.project_id,
-                progress_bar_type=None
-            )
+        Returns:
+            Dict with table information, or None if the table does not exist
+        """
+        try:
+            # A single tables.get call; no query job needed for existence and size
+            table = self.bq_client.client.get_table(f"{self.project_id}.{self.dataset_id}.{table_name}")
+            return {
+                "table_id": f"{table.project}.{table.dataset_id}.{table.table_id}",
+                "created": table.created,
+                "modified": table.modified,
+                "num_rows": table.num_rows,
+                "num_bytes": table.num_bytes
+            }
             
-            if not result.empty:
-                row = result.iloc[0]
-                return {
-                    "table_id": f"{self.project_id}.{self.dataset_id}.{table_name}",
-                    "created": row['creation_time'],
-                    "modified": row['last_modified_time'],
-                    "num_rows": row['row_count'],
-                    "num_bytes": row['size_bytes']
-                }
-            else:
-                return None
-                
+        except NotFound:
+            return None
         except Exception as e:
             logger.error(f"Error getting table info: {str(e)}")
             return None
@@ -269,6 +371,19 @@ class StackAdaptToBigQueryPipeline:
         Returns:
             DataFrame with summary data
         """
+        # At most 20 rows, so the REST readback beats setting up a Storage API read session
+        return self.start_performance_summary(table_name).to_dataframe(create_bqstorage_client=False)
+    
+    def start_performance_summary(self, table_name: str = "stackadapt_ads_temp") -> bigquery.QueryJob:
+        """
+        Submit the performance summary query without waiting for it
+        
+        Args:
+            table_name: Name of the table to query
+            
+        Returns:
+            bigquery.QueryJob for the summary (see query_performance_summary for the columns)
+        """
         query = f"""
         SELECT 
             date,
@@ -282,17 +397,13 @@ class StackAdaptToBigQueryPipeline:
             SAFE_DIVIDE(SUM(CAST(clicks AS INT64)), SUM(CAST(impressions AS INT64))) as ctr,
             SAFE_DIVIDE(SUM(CAST(cost AS FLOAT64)), SUM(CAST(clicks AS INT64))) / 100.0 as cpc_dollars,
             SAFE_DIVIDE(SUM(CAST(cost AS FLOAT64)), SUM(CAST(impressions AS INT64))) * 10 as cpm_dollars
-        FROM `{self.project_id}.{self.dataset_id}.{table_name}`
+        FROM `{self._checked_table_name(table_name)}`
         GROUP BY date, campaign_group_name, campaign_name
         ORDER BY date DESC, total_cost_cents DESC
         LIMIT 20
         """
         
-        return pandas_gbq.read_gbq(
-            query,
-            project_id=self.project_id,
-            progress_bar_type=None
-        )
+        return self.run_query(query)
     
     def merge_ads_performance(self, temp_table_name: str = "stackadapt_ads_temp", 
                              target_table_name: str = "stackadapt_ads") -> bool:
@@ -309,26 +420,28 @@ class StackAdaptToBigQueryPipeline:
         """
         try:
             # Check if target table exists
-            target_table_id = f"{self.project_id}.{self.dataset_id}.{target_table_name}"
-            temp_table_id = f"{self.project_id}.{self.dataset_id}.{temp_table_name}"
+            # Tables are referenced unqualified; run_query sets the dataset as the default
+            target_table = self._checked_table_name(target_table_name)
+            temp_table = self._checked_table_name(temp_table_name)
             
-            # Try to get info about target table to see if it exists
-            target_exists = self.get_table_info(target_table_name) is not None
+            # Column types of the target (None if it does not exist yet) decide how to merge
+            target_types = self._column_types(target_table_name)
             
-            if not target_exists:
+            if target_types is None:
                 logger.info(f"Target table {target_table_name} does not exist. Creating from temp table...")
                 
-                # Create target table by copying temp table structure and data
+                # Create target table by copying temp table structure and data,
+                # partitioned by date so later merges only touch the loaded days
                 create_query = f"""
-                CREATE TABLE `{target_table_id}` AS
-                SELECT * FROM `{temp_table_id}`
+                CREATE TABLE `{target_table}`
+                PARTITION BY date
+                CLUSTER BY ad_id
+                AS
+                SELECT * FROM `{temp_table}`
                 """
                 
-                pandas_gbq.read_gbq(
-                    create_query,
-                    project_id=self.project_id,
-                    progress_bar_type=None
-                )
+                # DDL has no result rows, so just wait for the job instead of building a DataFrame
+                self.run_query(create_query).result()
                 
                 logger.info(f"Successfully created {target_table_name} table with data from {temp_table_name}")
                 return True
@@ -336,57 +449,58 @@ class StackAdaptToBigQueryPipeline:
             else:
                 logger.info(f"Target table {target_table_name} exists. Performing upsert merge...")
                 
-                # Perform MERGE operation with upsert logic
+                temp_types = {field.name: _standard_sql_type(field.field_type) for field in ADS_PERFORMANCE_SCHEMA}
+                merge_columns = [col for col in temp_types if col in target_types]
+                missing = [col for col in temp_types if col not in target_types]
+                if 'ad_id' in missing or 'date' in missing:
+                    raise ValueError(f"Target table {target_table_name} has no ad_id/date columns to merge on")
+                if missing:
+                    logger.warning(f"Target table {target_table_name} lacks columns {missing}; they are not merged")
+                
+                # Date bounds of the new data, used to prune the target to the touched partitions
+                bounds_query = f"SELECT MIN(date) AS dmin, MAX(date) AS dmax FROM `{temp_table}`"
+                bounds = next(iter(self.run_query(bounds_query).result()))
+                if bounds.dmin is None:
+                    logger.info(f"Temp table {temp_table_name} is empty. Nothing to merge")
+                    return True
+                
+                # Perform MERGE operation with upsert logic, scoped to the loaded date range.
+                # Targets created before the explicit schema (pandas-gbq inferred DATETIME/TIMESTAMP
+                # dates and FLOAT metrics) get the source values cast to their column types.
+                def source_value(col: str) -> str:
+                    if target_types[col] == temp_types[col]:
+                        return f"source.{col}"
+                    return f"CAST(source.{col} AS {target_types[col]})"
+                
+                def date_bound(param: str) -> str:
+                    if target_types['date'] == 'DATE':
+                        return param
+                    return f"CAST({param} AS {target_types['date']})"
+                
+                update_columns = [col for col in merge_columns if col not in ('ad_id', 'date')]
+                update_set = ",\n                    ".join(f"{col} = {source_value(col)}" for col in update_columns)
+                insert_columns = ", ".join(merge_columns)
+                insert_values = ", ".join(source_value(col) for col in merge_columns)
                 merge_query = f"""
-                MERGE `{target_table_id}` AS target
-                USING `{temp_table_id}` AS source
-                ON target.ad_id = source.ad_id AND target.date = source.date
+                MERGE `{target_table}` AS target
+                USING `{temp_table}` AS source
+                ON target.ad_id = {source_value('ad_id')} AND target.date = {source_value('date')}
+                  AND target.date BETWEEN {date_bound('@dmin')} AND {date_bound('@dmax')}
                 WHEN MATCHED THEN
                   UPDATE SET
-                    ad_name = source.ad_name,
-                    campaign_id = source.campaign_id,
-                    campaign_name = source.campaign_name,
-                    campaign_group_id = source.campaign_group_id,
-                    campaign_group_name = source.campaign_group_name,
-                    goalType = source.goalType,
-                    clicks = source.clicks,
-                    clickConversions = source.clickConversions,
-                    engagements = source.engagements,
-                    videoStarts = source.videoStarts,
-                    videoQ1Playbacks = source.videoQ1Playbacks,
-                    videoQ2Playbacks = source.videoQ2Playbacks,
-                    videoQ3Playbacks = source.videoQ3Playbacks,
-                    videoCompletions = source.videoCompletions,
-                    impressions = source.impressions,
-                    frequency = source.frequency,
-                    cost = source.cost,
-                    _loaded_at = source._loaded_at,
-                    _source = source._source
+                    {update_set}
                 WHEN NOT MATCHED THEN
-                  INSERT (
-                    ad_id, ad_name, date, campaign_id, campaign_name,
-                    campaign_group_id, campaign_group_name, goalType,
-                    clicks, clickConversions, engagements, videoStarts,
-                    videoQ1Playbacks, videoQ2Playbacks, videoQ3Playbacks,
-                    videoCompletions, impressions, frequency, cost,
-                    _loaded_at, _source
-                  )
-                  VALUES (
-                    source.ad_id, source.ad_name, source.date, source.campaign_id, source.campaign_name,
-                    source.campaign_group_id, source.campaign_group_name, source.goalType,
-                    source.clicks, source.clickConversions, source.engagements, source.videoStarts,
-                    source.videoQ1Playbacks, source.videoQ2Playbacks, source.videoQ3Playbacks,
-                    source.videoCompletions, source.impressions, source.frequency, source.cost,
-                    source._loaded_at, source._source
-                  )
+                  INSERT ({insert_columns})
+                  VALUES ({insert_values})
                 """
                 
-                pandas_gbq.read_gbq(
-                    merge_query,
-                    project_id=self.project_id,
-                    progress_bar_type=None
-                )
+                merge_job = self.run_query(merge_query, query_parameters=[
+                    bigquery.ScalarQueryParameter('dmin', 'DATE', bounds.dmin),
+                    bigquery.ScalarQueryParameter('dmax', 'DATE', bounds.dmax),
+                ])
+                merge_job.result()
                 
+                logger.info(f"Merged {merge_job.num_dml_affected_rows} rows for {bounds.dmin} to {bounds.dmax}")
                 logger.info(f"Successfully merged data from {temp_table_name} into {target_table_name}")
                 return True
                 
@@ -401,13 +515,23 @@ def main():
     parser = argparse.ArgumentParser(description='Sync StackAdapt ads data to BigQuery')
     parser.add_argument('--bulk', action='store_true', default=True,
                         help='Use bulk API mode (default: True)')
+    parser.add_argument('--no-bulk', dest='bulk', action='store_false',
+                        help='Fetch each advertiser with its own request')
+    parser.add_argument('--async', dest='use_async', action='store_true', default=False,
+                        help='Overlap per-advertiser requests with asyncio (requires --no-bulk)')
+    parser.add_argument('--max-concurrency', type=int, default=8,
+                        help='Maximum per-advertiser requests in flight (default: 8)')
     parser.add_argument('--dataset', type=str, default='raw_ads',
                         help='BigQuery dataset ID (default: raw_ads)')
     parser.add_argument('--project', type=str, default=None,
                         help='GCP project ID (default: use GOOGLE_CLOUD_PROJECT env var)')
     parser.add_argument('--days-back', type=int, default=30,
                         help='Number of days back from today to fetch data (default: 30)')
+    parser.add_argument('--shard-days', type=int, default=None,
+                        help='Upload in parallel load jobs of this many days each (default: one load job)')
     args = parser.parse_args()
+    if args.shard_days is not None:
+        args.shard_days = max(1, args.shard_days)
     
     logger.info("Starting StackAdapt to BigQuery sync")
     logger.info(f"Using bulk mode: {args.bulk}")
@@ -423,10 +547,31 @@ def main():
         # Sync ads performance data to temp table
         logger.info("\n" + "="*60)
         logger.info("Syncing StackAdapt ads performance data...")
-        count = pipeline.sync_ads_performance(use_bulk=args.bulk, days_back=args.days_back)
+        count = pipeline.sync_ads_performance(
+            use_bulk=args.bulk,
+            days_back=args.days_back,
+            use_async=args.use_async,
+            max_concurrency=args.max_concurrency,
+            shard_days=args.shard_days
+        )
         logger.info(f"Synced {count} performance records to temp table")
         
         if count > 0:
+            # Submit the temp table readouts now so they run while the merge and metadata calls do
+            summary_job = pipeline.start_performance_summary()
+            date_range_query = f"""
+            SELECT 
+                MIN(date) as earliest_date,
+                MAX(date) as latest_date,
+                COUNT(DISTINCT date) as days_of_data,
+                COUNT(*) as total_rows,
+                COUNT(DISTINCT campaign_group_id) as num_campaign_groups,
+                COUNT(DISTINCT campaign_id) as num_campaigns,
+                COUNT(DISTINCT ad_id) as num_ads
+            FROM `stackadapt_ads_temp`
+            """
+            date_range_job = pipeline.run_query(date_range_query)
+            
             # Merge temp data into main table
             logger.info("\n" + "="*60)
             logger.info("Merging temp data into main stackadapt_ads table...")
@@ -451,30 +596,15 @@ def main():
             # Query summary data
             logger.info("\n" + "="*60)
             logger.info("Performance summary by campaign:")
-            summary_df = pipeline.query_performance_summary()
+            summary_df = summary_job.to_dataframe(create_bqstorage_client=False)
             if not summary_df.empty:
-                logger.info(f"\n{summary_df.to_string()}")
+                logger.info("\n%s", summary_df.to_csv(sep='\t', index=False))
             
             # Show date range of data
             logger.info("\n" + "="*60)
             logger.info("Date range of data in temp table:")
-            date_range_query = f"""
-            SELECT 
-                MIN(date) as earliest_date,
-                MAX(date) as latest_date,
-                COUNT(DISTINCT date) as days_of_data,
-                COUNT(*) as total_rows,
-                COUNT(DISTINCT campaign_group_id) as num_campaign_groups,
-                COUNT(DISTINCT campaign_id) as num_campaigns,
-                COUNT(DISTINCT ad_id) as num_ads
-            FROM `{pipeline.project_id}.{pipeline.dataset_id}.stackadapt_ads_temp`
-            """
-            date_range = pandas_gbq.read_gbq(
-                date_range_query,
-                project_id=pipeline.project_id,
-                progress_bar_type=None
-            )
-            logger.info(f"\n{date_range.to_string()}")
+            date_range = date_range_job.to_dataframe(create_bqstorage_client=False)
+            logger.info("\n%s", date_range.to_csv(sep='\t', index=False))
         
     except Exception as e:
         logger.error(f"Pipeline failed: {str(e)}")
@@ -1,8 +1,10 @@
-from fastapi import FastAPI, HTTPException, BackgroundTasks
-from pydantic import BaseModel
-from typing import Optional
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Response
+from pydantic import BaseModel, Field
+from typing import Dict, Optional, Tuple
 import logging
-from datetime import datetime, timedelta
+import threading
+from uuid import uuid4
+from datetime import datetime, timedelta, timezone
 import os
 from StackAdaptToBigQueryPipeline import StackAdaptToBigQueryPipeline
 
@@ -19,11 +21,40 @@ app = FastAPI(
     version="1.0.0"
 )
 
+# Pipelines are reused across requests so credentials and HTTP connection pools persist.
+# Each one is paired with a lock that serializes its syncs: they all share the same temp
+# table, so overlapping syncs could drop or truncate it under another sync's merge.
+_pipelines: Dict[Tuple[str, Optional[str]], Tuple[StackAdaptToBigQueryPipeline, threading.Lock]] = {}
+_pipelines_lock = threading.Lock()
+
+def get_or_create_pipeline(dataset_id: str, project_id: Optional[str] = None) -> Tuple[StackAdaptToBigQueryPipeline, threading.Lock]:
+    """
+    Get the shared pipeline for a dataset/project pair, creating it on first use
+    
+    Args:
+        dataset_id: BigQuery dataset ID
+        project_id: GCP project ID (None uses the default from BigQueryClient)
+        
+    Returns:
+        Tuple of (StackAdaptToBigQueryPipeline, lock to hold while syncing with it)
+    """
+    key = (dataset_id, project_id)
+    with _pipelines_lock:
+        entry = _pipelines.get(key)
+        if entry is None:
+            entry = (StackAdaptToBigQueryPipeline(dataset_id=dataset_id, project_id=project_id), threading.Lock())
+            _pipelines[key] = entry
+    return entry
+
 class SyncRequest(BaseModel):
     days_back: Optional[int] = 30
     use_bulk: Optional[bool] = True
+    use_async: Optional[bool] = False  # Overlap per-advertiser requests (only when use_bulk is False)
+    max_concurrency: Optional[int] = Field(8, ge=1)
+    shard_days: Optional[int] = Field(None, ge=1)  # Upload in parallel load jobs of this many days each
     dataset_id: Optional[str] = "raw_ads"
     project_id: Optional[str] = None  # Will use default from BigQueryClient if None
+    background: Optional[bool] = False  # Return 202 with a job_id and run the sync after responding
 
 class SyncResponse(BaseModel):
     status: str
@@ -32,6 +63,11 @@ class SyncResponse(BaseModel):
     execution_time_seconds: Optional[float] = None
     timestamp: str
     date_range: Optional[dict] = None
+    job_id: Optional[str] = None
+
+# Background sync jobs by job_id (in-process only; lost on restart)
+jobs: Dict[str, dict] = {}
+_jobs_lock = threading.Lock()
 
 @app.get("/")
 async def root():
@@ -43,57 +79,64 @@ async def health_check():
     """Health check endpoint for Cloud Run"""
     return {"status": "healthy", "timestamp": datetime.utcnow().isoformat()}
 
-@app.post("/sync-ads-insights", response_model=SyncResponse)
-async def sync_ads_insights(request: Optional[SyncRequest] = None, background_tasks: BackgroundTasks = None):
+def run_sync(request: SyncRequest) -> SyncResponse:
     """
-    Sync StackAdapt ads performance data to BigQuery
+    Run the StackAdapt sync and merge for a request
     
     Args:
-        request: Optional SyncRequest with configuration parameters (uses defaults if not provided)
+        request: SyncRequest with configuration parameters
         
     Returns:
         SyncResponse with sync results
+        
+    Raises:
+        HTTPException: 500 with error details if the sync fails
     """
     start_time = datetime.utcnow()
     
-    # Use defaults if no request body provided
-    if request is None:
-        request = SyncRequest()
-    
     try:
-        # Calculate date range
-        date_to = datetime.now().strftime("%Y-%m-%d")
-        date_from = (datetime.now() - timedelta(days=request.days_back)).strftime("%Y-%m-%d")
+        # Calculate date range; the same clock read is passed to the pipeline below
+        now = datetime.now(timezone.utc)
+        date_to = now.strftime("%Y-%m-%d")
+        date_from = (now - timedelta(days=request.days_back)).strftime("%Y-%m-%d")
         
         logger.info(f"Starting StackAdapt sync with {request.days_back} days back")
         logger.info(f"Date range: {date_from} to {date_to}")
         logger.info(f"Using bulk mode: {request.use_bulk}")
         
-        # Initialize pipeline
-        pipeline = StackAdaptToBigQueryPipeline(
-            dataset_id=request.dataset_id,
-            project_id=request.project_id
-        )
-        
-        # Sync ads performance data to temp table
-        logger.info(f"Syncing ads performance data for last {request.days_back} days...")
-        count = pipeline.sync_ads_performance(
-            use_bulk=request.use_bulk,
-            days_back=request.days_back
-        )
-        logger.info(f"Synced {count} performance records to temp table")
+        # Reuse the pipeline (and its clients) for this dataset/project
+        pipeline, sync_lock = get_or_create_pipeline(request.dataset_id, request.project_id)
         
-        # Merge temp data into main table if we got records
-        merge_success = False
-        if count > 0:
-            logger.info("Merging temp data into main stackadapt_ads table...")
-            merge_success = pipeline.merge_ads_performance()
-            if merge_success:
-                logger.info("Successfully merged data into main table")
+        # Hold the lock across sync and merge so no other sync touches the temp table in between
+        if not sync_lock.acquire(blocking=False):
+            logger.info("Another sync for this dataset is running, waiting for it to finish...")
+            sync_lock.acquire()
+        try:
+            # Sync ads performance data to temp table
+            logger.info(f"Syncing ads performance data for last {request.days_back} days...")
+            count = pipeline.sync_ads_performance(
+                use_bulk=request.use_bulk,
+                days_back=request.days_back,
+                use_async=request.use_async,
+                max_concurrency=request.max_concurrency,
+                shard_days=request.shard_days,
+                now=now
+            )
+            logger.info(f"Synced {count} performance records to temp table")
+            
+            # Merge temp data into main table if we got records
+            merge_success = False
+            if count > 0:
+                logger.info("Merging temp data into main stackadapt_ads table...")
+                merge_success = pipeline.merge_ads_performance()
+                if merge_success:
+                    logger.info("Successfully merged data into main table")
+                else:
+                    logger.warning("Failed to merge data into main table, but temp table has data")
             else:
-                logger.warning("Failed to merge data into main table, but temp table has data")
-        else:
-            logger.info("No performance data to merge")
+                logger.info("No performance data to merge")
+        finally:
+            sync_lock.release()
         
         end_time = datetime.utcnow()
         execution_time = (end_time - start_time).total_seconds()
@@ -127,3 +170,53 @@ async def sync_ads_insights(request: Optional[SyncRequest] = None, background_ta
                 "timestamp": end_time.isoformat()
             }
         )
+
+def _run_sync_job(job_id: str, request: SyncRequest):
+    """Run a background sync and record its outcome under job_id"""
+    try:
+        result = run_sync(request).model_dump(exclude={'job_id'})
+    except HTTPException as e:
+        result = e.detail
+    with _jobs_lock:
+        jobs[job_id].update(result)
+
+@app.post("/sync-ads-insights", response_model=SyncResponse)
+def sync_ads_insights(response: Response, background_tasks: BackgroundTasks, request: Optional[SyncRequest] = None):
+    """
+    Sync StackAdapt ads performance data to BigQuery
+    
+    Declared as a plain def so FastAPI runs the blocking sync in its threadpool,
+    which also leaves the async fetch free to start its own event loop.
+    With background=True the sync runs after a 202 response; poll /jobs/{job_id}.
+    
+    Args:
+        request: Optional SyncRequest with configuration parameters (uses defaults if not provided)
+        
+    Returns:
+        SyncResponse with sync results, or the accepted job when running in the background
+    """
+    # Use defaults if no request body provided
+    if request is None:
+        request = SyncRequest()
+    
+    if not request.background:
+        return run_sync(request)
+    
+    job_id = uuid4().hex
+    timestamp = datetime.utcnow().isoformat()
+    with _jobs_lock:
+        jobs[job_id] = {"status": "running", "message": "Sync started", "timestamp": timestamp, "job_id": job_id}
+    background_tasks.add_task(_run_sync_job, job_id, request)
+    
+    logger.info(f"Accepted background sync job {job_id}")
+    response.status_code = 202
+    return SyncResponse(status="accepted", message="Sync started", timestamp=timestamp, job_id=job_id)
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Status of a background sync job"""
+    with _jobs_lock:
+        job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    return job
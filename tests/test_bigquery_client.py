@@ -0,0 +1,32 @@
+import unittest
+from unittest import mock
+
+import pandas as pd
+from google.cloud import bigquery
+
+from BigQueryClient import BigQueryClient
+
+
+class LoadDataframesBatchedTest(unittest.TestCase):
+    def test_truncate_applies_to_first_batch_only(self):
+        # Skip __init__ so no credentials are needed; only load_table_from_dataframe is used
+        client = BigQueryClient.__new__(BigQueryClient)
+        client.logger = mock.Mock()
+        frames = [pd.DataFrame({"a": [1, 2]}), pd.DataFrame({"a": [3, 4]})]
+
+        with mock.patch.object(BigQueryClient, "load_table_from_dataframe") as load:
+            jobs = client.load_dataframes_batched(
+                frames, "project.dataset.table", batch_rows=2,
+                write_disposition=bigquery.WriteDisposition.WRITE_TRUNCATE
+            )
+
+        self.assertEqual(len(jobs), 2)
+        dispositions = [call.kwargs["job_config"].write_disposition for call in load.call_args_list]
+        self.assertEqual(dispositions, [
+            bigquery.WriteDisposition.WRITE_TRUNCATE,
+            bigquery.WriteDisposition.WRITE_APPEND,
+        ])
+
+
+if __name__ == "__main__":
+    unittest.main()
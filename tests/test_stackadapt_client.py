@@ -0,0 +1,102 @@
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+import pyarrow.parquet as pq
+
+import StackAdaptClient
+from StackAdaptClient import ADS_PERFORMANCE_ARROW_SCHEMA, StackAdaptClient as Client, _is_transient_error
+
+
+THROTTLED = {"message": "Too many requests", "extensions": {"code": "THROTTLED"}}
+
+
+def make_client() -> Client:
+    return Client(api_key="test-key", endpoint="http://localhost/graphql", cache_dir=None, memoize=False)
+
+
+class TransientErrorTest(unittest.TestCase):
+    def test_null_field_with_throttled_error_is_transient(self):
+        result = {"data": {"campaignGroupInsight": None}, "errors": [THROTTLED]}
+        self.assertTrue(_is_transient_error(result))
+
+    def test_null_data_with_throttled_error_is_transient(self):
+        self.assertTrue(_is_transient_error({"data": None, "errors": [THROTTLED]}))
+
+    def test_partial_data_is_not_transient(self):
+        result = {"data": {"campaignGroupInsight": {"records": None}}, "errors": [THROTTLED]}
+        self.assertFalse(_is_transient_error(result))
+
+    def test_validation_error_is_not_transient(self):
+        result = {"data": {"campaignGroupInsight": None}, "errors": [{"message": "Unknown field"}]}
+        self.assertFalse(_is_transient_error(result))
+
+    def test_success_is_not_transient(self):
+        self.assertFalse(_is_transient_error({"data": {"campaignGroupInsight": {"records": None}}}))
+
+
+class ExecuteQueryRetryTest(unittest.TestCase):
+    def test_retries_throttled_null_field_response(self):
+        client = make_client()
+        responses = [
+            {"data": {"campaignGroupInsight": None}, "errors": [THROTTLED]},
+            {"data": {"campaignGroupInsight": {"records": {"edges": []}}}},
+        ]
+        with mock.patch.object(client, "_post", side_effect=responses) as post, \
+                mock.patch.object(StackAdaptClient, "_retry_delay", return_value=0.0):
+            result = client.execute_query("query { campaignGroupInsight { records } }")
+
+        self.assertEqual(post.call_count, 2)
+        self.assertEqual(result, responses[1])
+
+
+def insights_response(*edges):
+    return {"data": {"campaignGroupInsight": {"records": {"edges": list(edges)}}}}
+
+
+def insight_edge(ad_id, day, conversions=None):
+    metrics = {name: 1 for name in Client.METRIC_COLUMNS}
+    metrics["clickConversions"] = conversions
+    return {
+        "node": {
+            "attributes": {
+                "ad": {
+                    "id": ad_id,
+                    "name": f"Ad {ad_id}",
+                    "campaign": {
+                        "id": "c1",
+                        "name": "Campaign",
+                        "goalType": "CLICK",
+                        "campaignGroup": {"id": "g1", "name": "Group"},
+                    },
+                },
+                "date": day,
+            },
+            "metrics": metrics,
+        }
+    }
+
+
+class ParquetOutputTest(unittest.TestCase):
+    def test_cli_writes_typed_parquet_schema(self):
+        # clickConversions is null in every row, which an inferred schema would type as null
+        results = [insights_response(insight_edge("a1", "2024-01-01"), insight_edge("a2", "2024-01-02"))]
+        with tempfile.TemporaryDirectory() as tmp:
+            out = os.path.join(tmp, "insights.parquet")
+            argv = ["StackAdaptClient.py", "--out", out, "--parquet", "--no-cache"]
+            with mock.patch.dict(os.environ, {"STACKADAPT_API_KEY": "test-key"}), \
+                    mock.patch.object(sys, "argv", argv), \
+                    mock.patch.object(Client, "test_connection", return_value=True), \
+                    mock.patch.object(Client, "fetch_all_ad_insights", return_value=results):
+                StackAdaptClient.main()
+            table = pq.read_table(out)
+
+        self.assertEqual(table.schema, ADS_PERFORMANCE_ARROW_SCHEMA)
+        self.assertEqual(table.num_rows, 2)
+        self.assertEqual(table["clickConversions"].null_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()